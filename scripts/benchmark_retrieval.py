@@ -0,0 +1,305 @@
+"""
+Retrieval Benchmark
+
+Measures retrieval quality and latency so chunking and index changes can
+be compared. Every (backend, similarity_top_k) run reports hit_rate@k
+(share of questions with at least one relevant node in the top k), MRR and
+p50/p95/p99 retrieval latency, and all runs are written to one JSON file.
+
+By default the questions are the held-out set in benchmarks/<book_id>.jsonl:
+paraphrased student questions labelled with the lecture that answers them.
+The chapter and lecture titles of the TOC (--questions toc) are quicker to
+get but appear verbatim in the page headings, which favours BM25 over the
+vector backends. The nodes from out/semantic_nodes.jsonl are embedded with
+the deterministic local HashEmbedding, so the benchmark needs no network or
+API key.
+
+Usage:
+    python benchmark_retrieval.py
+    python benchmark_retrieval.py --backends numpy hybrid --top-k 5 10
+    python benchmark_retrieval.py --questions questions.jsonl
+    python benchmark_retrieval.py --questions toc
+
+Question file (JSON Lines); gold fields are any of chapter_id, lecture_id,
+page_from and page_to, and a node is relevant if it matches all given:
+    {"question": "...", "chapter_id": 2, "lecture_id": 1}
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core import StorageContext, VectorStoreIndex, load_index_from_storage
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import TextNode
+
+from biology_textbook import DEFAULT_BOOK_ID, BiologyTextbook, get_textbook
+from bm25_index import BM25Index, BM25Retriever, HybridRetriever, build_bm25_index
+from config import OpenAISettings, load_openai_settings, load_retrieval_settings
+from embedding_cache import LOCAL_EMBEDDING_MODEL, build_embed_model
+from jsonl_io import artifact_path, iter_records
+from metadata_filter import RetrievalFilters
+from numpy_vector_store import NumpyRetriever, NumpyVectorStore, export_numpy_store
+from side_table import node_record
+
+OUT_DIR = Path(__file__).parent / "out"
+QUESTIONS_DIR = Path(__file__).parent / "benchmarks"
+BACKENDS = ("default", "numpy", "bm25", "hybrid")
+
+
+@dataclass
+class BenchmarkQuestion:
+    """A question and the chapter/lecture/pages its answer is on"""
+    question: str
+    gold: RetrievalFilters
+
+
+@dataclass
+class RunResult:
+    """Metrics of one (backend, top_k) run"""
+    backend: str
+    top_k: int
+    questions: int
+    hit_rate: float
+    mrr: float
+    latency_ms: Dict[str, float]
+
+
+def toc_questions(textbook: BiologyTextbook) -> List[BenchmarkQuestion]:
+    """
+    Build a question set from a textbook TOC
+
+    Each lecture title is a question whose gold label is its lecture, and
+    each chapter title one whose gold label is its chapter. The titles are
+    repeated word for word in the book, so this set favours lexical search.
+
+    Args:
+        textbook: Textbook whose chapters and lectures are used
+
+    Returns:
+        List of BenchmarkQuestion
+    """
+    questions = []
+    for chapter in textbook.chapters:
+        questions.append(BenchmarkQuestion(chapter.title, RetrievalFilters(chapter_id=chapter.id)))
+        for lecture in chapter.lectures:
+            questions.append(BenchmarkQuestion(
+                lecture.title,
+                RetrievalFilters(chapter_id=chapter.id, lecture_id=lecture.id),
+            ))
+    return questions
+
+
+def load_questions(path: Path) -> List[BenchmarkQuestion]:
+    """Load a question set from a JSON Lines file (see module docstring)"""
+    fields = ("chapter_id", "lecture_id", "page_from", "page_to")
+    return [
+        BenchmarkQuestion(item["question"], RetrievalFilters(**{f: item.get(f) for f in fields}))
+        for item in iter_records(path)
+    ]
+
+
+def is_relevant(metadata: Dict[str, Any], gold: RetrievalFilters) -> bool:
+    """Whether a node's metadata satisfies every gold label"""
+    page = metadata.get("page")
+    if gold.chapter_id is not None and metadata.get("chapter_id") != gold.chapter_id:
+        return False
+    if gold.lecture_id is not None and metadata.get("lecture_id") != gold.lecture_id:
+        return False
+    if gold.page_from is not None and (page is None or page < gold.page_from):
+        return False
+    if gold.page_to is not None and (page is None or page > gold.page_to):
+        return False
+    return True
+
+
+def run_benchmark(
+    retriever: BaseRetriever,
+    questions: Sequence[BenchmarkQuestion],
+    backend: str,
+    top_k: int
+) -> RunResult:
+    """
+    Retrieve every question once and score the rankings
+
+    Args:
+        retriever: Retriever configured with similarity_top_k = top_k
+        questions: Question set
+        backend: Backend name, for the report
+        top_k: Number of retrieved nodes
+
+    Returns:
+        RunResult with hit_rate@k, MRR@k and latency percentiles
+
+    Raises:
+        ValueError: If questions is empty
+    """
+    if not questions:
+        raise ValueError("The question set is empty")
+
+    # Warm up lazily loaded indexes and caches before timing
+    retriever.retrieve(questions[0].question)
+
+    latencies = np.empty(len(questions))
+    hits = 0
+    reciprocal_ranks = 0.0
+    for i, item in enumerate(questions):
+        start = time.perf_counter()
+        nodes = retriever.retrieve(item.question)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        for rank, hit in enumerate(nodes[:top_k], 1):
+            if is_relevant(hit.node.metadata, item.gold):
+                hits += 1
+                reciprocal_ranks += 1.0 / rank
+                break
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return RunResult(
+        backend=backend,
+        top_k=top_k,
+        questions=len(questions),
+        hit_rate=hits / len(questions),
+        mrr=reciprocal_ranks / len(questions),
+        latency_ms={
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "mean": float(latencies.mean()),
+        },
+    )
+
+
+def load_nodes(path: Path) -> List[TextNode]:
+    """Rebuild TextNodes from semantic_nodes.jsonl records"""
+    return [
+        TextNode(
+            text=item["text"],
+            id_=item["node_id"],
+            metadata=item.get("metadata") or {},
+            start_char_idx=item.get("start_char_idx"),
+            end_char_idx=item.get("end_char_idx"),
+        )
+        for item in iter_records(path)
+    ]
+
+
+def build_index(
+    nodes_path: Path,
+    index_dir: Optional[Path],
+    embed_model: BaseEmbedding
+) -> VectorStoreIndex:
+    """
+    Load a persisted index, or embed the nodes into a new in-memory one
+
+    Args:
+        nodes_path: semantic_nodes.jsonl (used when index_dir is None)
+        index_dir: Persisted index, e.g. out/semantic_index; it must have
+            been built with the same embedding model
+        embed_model: Model for node and query embeddings
+    """
+    if index_dir is not None:
+        storage_context = StorageContext.from_defaults(persist_dir=str(index_dir))
+        return load_index_from_storage(storage_context=storage_context, embed_model=embed_model)
+    return VectorStoreIndex(load_nodes(nodes_path), embed_model=embed_model)
+
+
+def main():
+    retrieval_config = load_retrieval_settings()
+    parser = argparse.ArgumentParser(description="Benchmark retrieval quality and latency")
+    parser.add_argument("--nodes", type=Path, default=artifact_path(OUT_DIR, "semantic_nodes"),
+                        help="semantic_nodes.jsonl to index")
+    parser.add_argument("--index-dir", type=Path, default=None,
+                        help="Use a persisted index (e.g. out/semantic_index) instead of --nodes")
+    parser.add_argument("--questions", type=Path, default=None,
+                        help='Question set (JSON Lines), or "toc" for the textbook TOC titles '
+                             "(defaults to benchmarks/<book_id>.jsonl)")
+    parser.add_argument("--book-id", default=DEFAULT_BOOK_ID, help="Textbook of the question set")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--top-k", nargs="+", type=int, default=[1, 3, 5, 10])
+    parser.add_argument("--embed-model", default=LOCAL_EMBEDDING_MODEL,
+                        help='Embedding model ("local-hash" runs offline)')
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Results file (default out/benchmarks/retrieval-<time>.json)")
+    args = parser.parse_args()
+
+    if args.embed_model == LOCAL_EMBEDDING_MODEL:
+        openai_config = OpenAISettings(api_key="", embedding_model=LOCAL_EMBEDDING_MODEL)
+    else:
+        openai_config = load_openai_settings()
+        openai_config.embedding_model = args.embed_model
+    embed_model = build_embed_model(openai_config)
+
+    if str(args.questions) == "toc":
+        questions = toc_questions(get_textbook(args.book_id))
+    else:
+        args.questions = args.questions or QUESTIONS_DIR / f"{args.book_id}.jsonl"
+        questions = load_questions(args.questions)
+    if not questions:
+        parser.error(f"No questions in {args.questions}")
+    print(f"📋 {len(questions)} questions, embedding model {embed_model.model_name}")
+
+    index = build_index(args.nodes, args.index_dir, embed_model)
+
+    results: List[RunResult] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        numpy_store = bm25_index = None
+        if {"numpy", "hybrid"} & set(args.backends):
+            export_numpy_store(index, tmp / "vectors", dtype=retrieval_config.vector_dtype)
+            numpy_store = NumpyVectorStore(tmp / "vectors")
+        if {"bm25", "hybrid"} & set(args.backends):
+            node_ids = index.index_struct.nodes_dict.values()
+            build_bm25_index((node_record(index.docstore.get_node(i)) for i in node_ids), tmp / "bm25")
+            bm25_index = BM25Index(tmp / "bm25")
+
+        for backend in args.backends:
+            for top_k in args.top_k:
+                if backend == "default":
+                    retriever = index.as_retriever(similarity_top_k=top_k)
+                elif backend == "numpy":
+                    retriever = NumpyRetriever(numpy_store, embed_model, similarity_top_k=top_k)
+                elif backend == "bm25":
+                    retriever = BM25Retriever(bm25_index, similarity_top_k=top_k)
+                else:
+                    # Same fusion depth as semantic_query.build_retriever
+                    retriever = HybridRetriever(
+                        NumpyRetriever(numpy_store, embed_model, similarity_top_k=top_k * 4),
+                        BM25Retriever(bm25_index, similarity_top_k=top_k * 4),
+                        similarity_top_k=top_k,
+                        lexical_max_terms=retrieval_config.lexical_max_terms,
+                    )
+                result = run_benchmark(retriever, questions, backend, top_k)
+                results.append(result)
+                print(
+                    f"{backend:>8} k={top_k:<3} hit_rate={result.hit_rate:.3f} mrr={result.mrr:.3f} "
+                    f"p50={result.latency_ms['p50']:.2f}ms p95={result.latency_ms['p95']:.2f}ms "
+                    f"p99={result.latency_ms['p99']:.2f}ms"
+                )
+
+        # Close the stores' file handles before the temporary directory goes
+        for store in (numpy_store, bm25_index):
+            if store is not None:
+                store.close()
+
+    output = args.output or OUT_DIR / "benchmarks" / f"retrieval-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "embed_model": embed_model.model_name,
+            "nodes": len(index.index_struct.nodes_dict),
+            "questions": str(args.questions),
+            "runs": [asdict(result) for result in results],
+        }, f, ensure_ascii=False, indent=2)
+    print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
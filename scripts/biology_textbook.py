@@ -1,14 +1,22 @@
 """
-Biology Textbook Structure - Persian Biology Book (Grade 10)
+Textbook Structure - Persian Biology Book (Grade 10) and other textbooks
 
 Contains the table of contents with chapters, lectures, and page ranges.
+TOCs are loaded from JSON data files in `textbooks/` through a registry
+keyed by book id (e.g. "biology-10").
 """
 
+import json
+import os
 from dataclasses import dataclass
-from typing import List, Optional, Dict
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional, Tuple
 
+TEXTBOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "textbooks")
+DEFAULT_BOOK_ID = "biology-10"
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Lecture:
     """Represents a lecture (گفتار) within a chapter"""
     id: int
@@ -16,110 +24,267 @@ class Lecture:
     page: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Chapter:
     """Represents a chapter (فصل) in the textbook"""
     id: int
     title: str
     page: int
-    range: Dict[str, int]  # {"from": int, "to": int}
-    lectures: List[Lecture]
+    range_from: int
+    range_to: int
+    lectures: Tuple[Lecture, ...]
+
+    @property
+    def range(self) -> Dict[str, int]:
+        """Page range as {"from": int, "to": int}"""
+        return {"from": self.range_from, "to": self.range_to}
 
 
-@dataclass
+@dataclass(frozen=True)
 class BiologyTextbook:
     """Complete textbook structure"""
-    chapters: List[Chapter]
-
-
-# Biology Textbook Data (Grade 10)
-BIOLOGY_TEXTBOOK = BiologyTextbook(
-    chapters=[
-        Chapter(
-            id=1,
-            title="دنیای زنده",
-            page=1,
-            range={"from": 1, "to": 16},
-            lectures=[
-                Lecture(id=1, title="زیست‌شناسی چیست؟", page=2),
-                Lecture(id=2, title="گسترهٔ حیات", page=7),
-                Lecture(id=3, title="بدن انسان در بافت و یاخته", page=11),
-            ],
-        ),
-        Chapter(
-            id=2,
-            title="گوارش و جذب مواد",
-            page=17,
-            range={"from": 17, "to": 32},
-            lectures=[
-                Lecture(id=1, title="ساختار و عملکرد لولهٔ گوارش", page=18),
-                Lecture(id=2, title="جذب مواد و تنظیم فعالیت دستگاه گوارش", page=25),
-                Lecture(id=3, title="تنوع گوارش در جانداران", page=30),
-            ],
-        ),
-        Chapter(
-            id=3,
-            title="تبادلات گازی",
-            page=33,
-            range={"from": 33, "to": 46},
-            lectures=[
-                Lecture(id=1, title="کار و ساز دستگاه تنفس در انسان", page=34),
-                Lecture(id=2, title="تهویۀ ششی", page=40),
-                Lecture(id=3, title="تنوع تبادلات گازی", page=45),
-            ],
-        ),
-        Chapter(
-            id=4,
-            title="گردش مواد در بدن",
-            page=47,
-            range={"from": 47, "to": 68},
-            lectures=[
-                Lecture(id=1, title="قلب", page=48),
-                Lecture(id=2, title="رگ‌ها", page=55),
-                Lecture(id=3, title="خون", page=61),
-                Lecture(id=4, title="تنوع گردش مواد در جانداران", page=65),
-            ],
-        ),
-        Chapter(
-            id=5,
-            title="تنظیم اسمزی و دفع مواد زائد",
-            page=69,
-            range={"from": 69, "to": 78},
-            lectures=[
-                Lecture(id=1, title="کلیه‌ها و هم‌ایستایی", page=70),
-                Lecture(id=2, title="تشکیل ادرار و تخلیۀ آن", page=73),
-                Lecture(id=3, title="تنوع تنظیم اسمزی و دفع در جانداران", page=76),
-            ],
-        ),
-        Chapter(
-            id=6,
-            title="از یاخته تا گیاه",
-            page=79,
-            range={"from": 79, "to": 96},
-            lectures=[
-                Lecture(id=1, title="ویژگی‌های یاخته‌های گیاهی", page=80),
-                Lecture(id=2, title="سامانۀ بافتی", page=86),
-                Lecture(id=3, title="ساختار گیاهان", page=90),
-            ],
-        ),
-        Chapter(
-            id=7,
-            title="جذب و انتقال مواد در گیاهان",
-            page=97,
-            range={"from": 97, "to": 105},
-            lectures=[
-                Lecture(id=1, title="تغذیۀ گیاهی", page=98),
-                Lecture(id=2, title="جانداران مؤثر در تغذیۀ گیاهی", page=102),
-                Lecture(id=3, title="انتقال مواد در گیاهان", page=105),
-            ],
-        ),
-    ]
-)
+    chapters: Tuple[Chapter, ...]
+    id: str = DEFAULT_BOOK_ID
+    subject: str = "biology"
+    grade: Optional[int] = None
+    title: str = ""
+
+    @cached_property
+    def toc(self) -> "TocIndex":
+        """Compiled page lookup table, built once on first use"""
+        return TocIndex(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BiologyTextbook":
+        """
+        Build a textbook from its JSON data file contents
+
+        Args:
+            data: Dict with id, subject, grade, title and chapters (each with
+                id, title, page, range {"from", "to"} and lectures)
+
+        Returns:
+            BiologyTextbook instance
+        """
+        chapters = tuple(
+            Chapter(
+                id=ch["id"],
+                title=ch["title"],
+                page=ch["page"],
+                range_from=ch["range"]["from"],
+                range_to=ch["range"]["to"],
+                lectures=tuple(
+                    Lecture(id=lec["id"], title=lec["title"], page=lec["page"])
+                    for lec in ch.get("lectures", [])
+                ),
+            )
+            for ch in data["chapters"]
+        )
+        return cls(
+            chapters=chapters,
+            id=data["id"],
+            subject=data.get("subject", "biology"),
+            grade=data.get("grade"),
+            title=data.get("title", ""),
+        )
+
+
+class TextbookRegistry:
+    """
+    Lazily loaded collection of textbook TOCs, one JSON file per book
+
+    Only file names are listed up front; a book's TOC is parsed the first
+    time it is requested and kept for the life of the process.
+    """
+
+    def __init__(self, data_dir: str = TEXTBOOKS_DIR):
+        """
+        Initialize the registry
+
+        Args:
+            data_dir: Directory containing `<book_id>.json` TOC files
+        """
+        self.data_dir = data_dir
+        self._books: Dict[str, BiologyTextbook] = {}
+
+    def book_ids(self) -> List[str]:
+        """List the ids of all available books"""
+        if not os.path.isdir(self.data_dir):
+            return sorted(self._books)
+        ids = {name[:-5] for name in os.listdir(self.data_dir) if name.endswith(".json")}
+        return sorted(ids | set(self._books))
+
+    def register(self, textbook: BiologyTextbook) -> None:
+        """Add (or replace) a textbook that doesn't come from a data file"""
+        self._books[textbook.id] = textbook
+
+    def get(self, book_id: str) -> BiologyTextbook:
+        """
+        Get a textbook by id, loading its TOC file on first use
+
+        Args:
+            book_id: Book id, e.g. "biology-10"
+
+        Returns:
+            BiologyTextbook instance
+
+        Raises:
+            KeyError: If no TOC exists for the book id
+        """
+        textbook = self._books.get(book_id)
+        if textbook is None:
+            path = os.path.join(self.data_dir, f"{book_id}.json")
+            if not os.path.exists(path):
+                raise KeyError(f"Unknown textbook: {book_id}")
+            with open(path, "r", encoding="utf-8") as f:
+                textbook = BiologyTextbook.from_dict(json.load(f))
+            self._books[book_id] = textbook
+        return textbook
+
+
+TEXTBOOKS = TextbookRegistry()
+
+
+class FrozenDict(dict):
+    """Read-only dict, so lookup records can be shared between callers"""
+
+    __slots__ = ("_frozen",)
+
+    def __init__(self, *args, **kwargs):
+        if getattr(self, "_frozen", False):
+            self._readonly()
+        super().__init__(*args, **kwargs)
+        self._frozen = True
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("TOC records are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            self._readonly()
+        super().__setattr__(name, value)
+
+    # Immutable, so copies can share it; pickling rebuilds it from a plain dict
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class TocIndex:
+    """
+    Precomputed page → chapter/lecture table for one textbook
+
+    Lecture end pages are resolved once and every page maps to a shared,
+    read-only record, so lookups are a single list index.
+    """
+
+    def __init__(self, textbook: BiologyTextbook):
+        """
+        Compile the lookup table
+
+        Args:
+            textbook: BiologyTextbook instance
+        """
+        last_page = max((ch.range_to for ch in textbook.chapters), default=0)
+        self._by_page: List[Optional[FrozenDict]] = [None] * (last_page + 1)
+
+        for chapter in textbook.chapters:
+            chapter_record = FrozenDict(
+                id=chapter.id,
+                title=chapter.title,
+                page=chapter.page,
+                range=FrozenDict({"from": chapter.range_from, "to": chapter.range_to}),
+            )
+            # Pages of the chapter before its first lecture have no lecture
+            page_records = {
+                page: FrozenDict(chapter=chapter_record, lecture=None)
+                for page in range(chapter.range_from, chapter.range_to + 1)
+            }
+
+            lectures = chapter.lectures
+            for i, lec in enumerate(lectures):
+                start = lec.page
+                # End is either the start of next lecture - 1, or end of chapter
+                end = lectures[i + 1].page - 1 if i < len(lectures) - 1 else chapter.range_to
+                record = FrozenDict(
+                    chapter=chapter_record,
+                    lecture=FrozenDict(
+                        id=lec.id,
+                        title=lec.title,
+                        page=lec.page,
+                        range=FrozenDict({"from": start, "to": end}),
+                    ),
+                )
+                for page in range(start, end + 1):
+                    if page in page_records and page_records[page]["lecture"] is None:
+                        page_records[page] = record
+
+            for page, record in page_records.items():
+                # First matching chapter wins, as in a linear scan
+                if self._by_page[page] is None:
+                    self._by_page[page] = record
+
+    def lookup(self, page: int) -> Optional[FrozenDict]:
+        """
+        Find chapter and lecture information for a page
+
+        Args:
+            page: Page number
+
+        Returns:
+            Shared read-only record with "chapter" and "lecture", or None
+        """
+        if 0 < page < len(self._by_page):
+            return self._by_page[page]
+        return None
+
+    def lookup_many(self, pages: Iterable[int]) -> List[Optional[FrozenDict]]:
+        """
+        Look up many pages at once (e.g. for bulk metadata tagging)
+
+        Args:
+            pages: Page numbers
+
+        Returns:
+            List of records (or None) in the same order as pages
+        """
+        by_page = self._by_page
+        size = len(by_page)
+        return [by_page[p] if 0 < p < size else None for p in map(int, pages)]
+
+
+# Biology Textbook Data (Grade 10), from textbooks/biology-10.json
+BIOLOGY_TEXTBOOK = TEXTBOOKS.get(DEFAULT_BOOK_ID)
+
+
+def get_textbook(book_id: Optional[str] = None) -> BiologyTextbook:
+    """
+    Get a textbook from the registry
+
+    Args:
+        book_id: Book id (defaults to the grade 10 biology book)
+
+    Returns:
+        BiologyTextbook instance
+
+    Raises:
+        KeyError: If no TOC exists for the book id
+    """
+    return TEXTBOOKS.get(book_id or DEFAULT_BOOK_ID)
 
 
 def get_chapter_and_lecture_by_page(
     page: int, 
-    textbook: BiologyTextbook = BIOLOGY_TEXTBOOK
+    textbook: BiologyTextbook = BIOLOGY_TEXTBOOK,
+    book_id: Optional[str] = None
 ) -> Optional[Dict]:
     """
     Find chapter and lecture information for a given page number
@@ -127,9 +292,11 @@ def get_chapter_and_lecture_by_page(
     Args:
         page: Page number to look up
         textbook: BiologyTextbook instance (defaults to BIOLOGY_TEXTBOOK)
+        book_id: Registry id of the book to use instead of textbook
+            (e.g. "biology-11")
         
     Returns:
-        Dictionary with chapter and lecture info, or None if not found
+        Read-only dictionary with chapter and lecture info, or None if not found
         
     Example:
         >>> result = get_chapter_and_lecture_by_page(18)
@@ -137,75 +304,53 @@ def get_chapter_and_lecture_by_page(
         'گوارش و جذب مواد'
         >>> print(result['lecture']['title'])
         'ساختار و عملکرد لولهٔ گوارش'
+        >>> get_chapter_and_lecture_by_page(18, book_id="biology-10")['chapter']['id']
+        2
     """
     if not isinstance(page, int) or page < 1:
         return None
     
-    # Find the chapter
-    chapter = None
-    for ch in textbook.chapters:
-        if ch.range["from"] <= page <= ch.range["to"]:
-            chapter = ch
-            break
-    
-    if not chapter:
-        return None
-    
-    # Find the lecture within the chapter
-    lecture = None
-    lectures = chapter.lectures
-    
-    for i, lec in enumerate(lectures):
-        start = lec.page
-        # End is either the start of next lecture - 1, or end of chapter
-        end = lectures[i + 1].page - 1 if i < len(lectures) - 1 else chapter.range["to"]
-        
-        if start <= page <= end:
-            lecture = {
-                "id": lec.id,
-                "title": lec.title,
-                "page": lec.page,
-                "range": {"from": start, "to": end}
-            }
-            break
-    
-    return {
-        "chapter": {
-            "id": chapter.id,
-            "title": chapter.title,
-            "page": chapter.page,
-            "range": chapter.range
-        },
-        "lecture": lecture
-    }
-
-
-def get_chapter_info(page: int, textbook: BiologyTextbook = BIOLOGY_TEXTBOOK) -> Optional[Dict]:
+    if book_id is not None:
+        textbook = TEXTBOOKS.get(book_id)
+    return textbook.toc.lookup(page)
+
+
+def get_chapter_info(
+    page: int,
+    textbook: BiologyTextbook = BIOLOGY_TEXTBOOK,
+    book_id: Optional[str] = None
+) -> Optional[Dict]:
     """
     Get only chapter information for a page (without lecture details)
     
     Args:
         page: Page number
         textbook: BiologyTextbook instance
+        book_id: Registry id of the book to use instead of textbook
         
     Returns:
         Dictionary with chapter info or None
     """
-    result = get_chapter_and_lecture_by_page(page, textbook)
+    result = get_chapter_and_lecture_by_page(page, textbook, book_id)
     return result["chapter"] if result else None
 
 
-def get_lecture_info(page: int, textbook: BiologyTextbook = BIOLOGY_TEXTBOOK) -> Optional[Dict]:
+def get_lecture_info(
+    page: int,
+    textbook: BiologyTextbook = BIOLOGY_TEXTBOOK,
+    book_id: Optional[str] = None
+) -> Optional[Dict]:
     """
     Get only lecture information for a page
     
     Args:
         page: Page number
         textbook: BiologyTextbook instance
+        book_id: Registry id of the book to use instead of textbook
         
     Returns:
         Dictionary with lecture info or None
     """
-    result = get_chapter_and_lecture_by_page(page, textbook)
+    result = get_chapter_and_lecture_by_page(page, textbook, book_id)
     return result["lecture"] if result and result["lecture"] else None
 
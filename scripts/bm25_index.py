@@ -0,0 +1,268 @@
+"""
+Local BM25 Lexical Index
+
+Okapi BM25 over node text with the same Persian normalization as
+lib/vector-prep.ts, stored as compact CSR postings arrays. Gives a
+zero-network retriever for exact-term queries (e.g. "یاخته") and a hybrid
+mode that fuses BM25 and vector rankings with reciprocal rank fusion.
+
+Files in an index directory (plus the side_table files):
+    bm25.npz     term_offsets / doc_ids / tfs postings and doc_len
+    vocab.json   terms, in term-id order
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from metadata_filter import RetrievalFilters
+from persian_text import tokenize
+from side_table import SideTable, write_side_table
+
+PathLike = Union[str, Path]
+
+# Reciprocal rank fusion constant (Cormack et al.)
+RRF_K = 60
+
+
+def build_bm25_index(records: Iterable[Dict[str, Any]], out_dir: PathLike) -> int:
+    """
+    Build and save a BM25 index over node records
+
+    Args:
+        records: Node records ({"node_id", "text", "metadata", ...}), e.g.
+            from semantic_nodes.jsonl
+        out_dir: Index directory to (re)write
+
+    Returns:
+        Number of indexed nodes
+    """
+    out_dir = Path(out_dir)
+    records = list(records)
+    write_side_table(out_dir, records)
+
+    vocab: Dict[str, int] = {}
+    postings: List[List[Tuple[int, int]]] = []
+    doc_len = np.zeros(len(records), dtype=np.int32)
+
+    for row, record in enumerate(records):
+        terms = tokenize(record.get("text") or "")
+        doc_len[row] = len(terms)
+        for term, tf in Counter(terms).items():
+            term_id = vocab.setdefault(term, len(vocab))
+            if term_id == len(postings):
+                postings.append([])
+            postings[term_id].append((row, tf))
+
+    term_offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+    term_offsets[1:] = np.cumsum([len(p) for p in postings])
+    doc_ids = np.fromiter((row for p in postings for row, _ in p), dtype=np.int32, count=int(term_offsets[-1]))
+    tfs = np.fromiter((tf for p in postings for _, tf in p), dtype=np.uint16, count=int(term_offsets[-1]))
+
+    np.savez(out_dir / "bm25.npz", term_offsets=term_offsets, doc_ids=doc_ids, tfs=tfs, doc_len=doc_len)
+    with open(out_dir / "vocab.json", "w", encoding="utf-8") as f:
+        json.dump(list(vocab), f, ensure_ascii=False)
+    return len(records)
+
+
+class BM25Index(SideTable):
+    """Loaded BM25 postings plus the node side table"""
+
+    def __init__(self, index_dir: PathLike, k1: float = 1.5, b: float = 0.75):
+        """
+        Load an index written by build_bm25_index
+
+        Args:
+            index_dir: Index directory
+            k1: Term-frequency saturation
+            b: Length normalization strength
+        """
+        super().__init__(index_dir)
+        index_dir = Path(index_dir)
+        with np.load(index_dir / "bm25.npz") as data:
+            self.term_offsets = data["term_offsets"]
+            self.doc_ids = data["doc_ids"]
+            self.tfs = data["tfs"].astype(np.float32)
+            doc_len = data["doc_len"].astype(np.float32)
+        with open(index_dir / "vocab.json", "r", encoding="utf-8") as f:
+            self.vocab = {term: i for i, term in enumerate(json.load(f))}
+
+        n_docs = len(doc_len)
+        avg_len = float(doc_len.mean()) if n_docs else 0.0
+        self._k1 = k1
+        # Per-document denominator term, precomputed once
+        self._norm = k1 * (1 - b + b * doc_len / (avg_len or 1.0))
+        df = np.diff(self.term_offsets).astype(np.float32)
+        self._idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+    def has_terms(self, terms: Sequence[str]) -> bool:
+        """Whether every term occurs in the corpus"""
+        return bool(terms) and all(term in self.vocab for term in terms)
+
+    def scores(self, terms: Sequence[str]) -> np.ndarray:
+        """
+        BM25 score of every row for the query terms
+
+        Args:
+            terms: Tokenized query
+
+        Returns:
+            float32 array of scores, one per row
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in set(terms):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            rows = self.doc_ids[start:end]
+            tf = self.tfs[start:end]
+            scores[rows] += self._idf[term_id] * tf * (self._k1 + 1) / (tf + self._norm[rows])
+        return scores
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the top-k rows for a query
+
+        Args:
+            query: Query text (normalized and tokenized here)
+            top_k: Number of results
+            rows: Optional candidate rows (e.g. from metadata prefilters)
+
+        Returns:
+            List of (row, score), best first; rows with score 0 are dropped
+        """
+        scores = self.scores(tokenize(query))
+        if rows is not None:
+            mask = np.zeros(len(scores), dtype=bool)
+            mask[rows] = True
+            scores = np.where(mask, scores, 0.0)
+        matched = np.flatnonzero(scores > 0)
+        if matched.size == 0:
+            return []
+        k = min(top_k, matched.size)
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+
+class BM25Retriever(BaseRetriever):
+    """LlamaIndex retriever over a BM25Index (no embedding call)"""
+
+    def __init__(
+        self,
+        index: BM25Index,
+        similarity_top_k: int = 5,
+        filters: Optional[RetrievalFilters] = None,
+        **kwargs: Any
+    ):
+        """
+        Args:
+            index: Loaded BM25Index
+            similarity_top_k: Number of nodes to retrieve
+            filters: Optional chapter/lecture/page restrictions
+        """
+        super().__init__(**kwargs)
+        self.index = index
+        self.similarity_top_k = similarity_top_k
+        self.filters = filters
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        rows = None
+        if self.filters is not None:
+            rows = self.index.metadata_index.candidate_rows(self.filters)
+        hits = self.index.search(query_bundle.query_str, self.similarity_top_k, rows)
+        return [NodeWithScore(node=self.index.to_node(row), score=score) for row, score in hits]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[NodeWithScore]],
+    top_k: int,
+    k: int = RRF_K
+) -> List[NodeWithScore]:
+    """
+    Fuse ranked node lists by summing 1 / (k + rank)
+
+    Args:
+        rankings: Ranked result lists from different retrievers
+        top_k: Number of fused results
+        k: RRF constant
+
+    Returns:
+        Fused list, best first, with the RRF score as NodeWithScore.score
+    """
+    fused: Dict[str, float] = {}
+    nodes: Dict[str, NodeWithScore] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, 1):
+            node_id = hit.node.node_id
+            fused[node_id] = fused.get(node_id, 0.0) + 1.0 / (k + rank)
+            nodes.setdefault(node_id, hit)
+    best = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    return [NodeWithScore(node=nodes[node_id].node, score=fused[node_id]) for node_id in best]
+
+
+def is_lexical_query(index: BM25Index, query_str: str, max_terms: int) -> bool:
+    """
+    Whether hybrid retrieval takes the lexical-only fast path for a query
+
+    Args:
+        index: BM25 index of the corpus
+        query_str: Query text
+        max_terms: HybridRetriever.lexical_max_terms
+
+    Returns:
+        True when the query has at most max_terms terms and all of them
+        occur in the corpus (no embedding is needed)
+    """
+    terms = tokenize(query_str)
+    return len(terms) <= max_terms and index.has_terms(terms)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25 + vector retrieval fused with reciprocal rank fusion
+
+    Short queries whose terms all occur in the corpus (exact term lookups
+    such as "یاخته") take a lexical-only fast path with no embedding call.
+    """
+
+    def __init__(
+        self,
+        vector_retriever: BaseRetriever,
+        bm25_retriever: BM25Retriever,
+        similarity_top_k: int = 5,
+        lexical_max_terms: int = 2,
+        **kwargs: Any
+    ):
+        """
+        Args:
+            vector_retriever: Embedding retriever (ideally with a deeper top-k)
+            bm25_retriever: Lexical retriever (ideally with a deeper top-k)
+            similarity_top_k: Number of fused nodes to return
+            lexical_max_terms: Queries with at most this many terms use the
+                lexical-only fast path (0 disables it)
+        """
+        super().__init__(**kwargs)
+        self.vector_retriever = vector_retriever
+        self.bm25_retriever = bm25_retriever
+        self.similarity_top_k = similarity_top_k
+        self.lexical_max_terms = lexical_max_terms
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        lexical = self.bm25_retriever.retrieve(query_bundle)
+        if is_lexical_query(self.bm25_retriever.index, query_bundle.query_str, self.lexical_max_terms):
+            return lexical[:self.similarity_top_k]
+
+        vector = self.vector_retriever.retrieve(query_bundle)
+        return reciprocal_rank_fusion([vector, lexical], self.similarity_top_k)
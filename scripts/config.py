@@ -21,6 +21,19 @@ class ParserSettings:
     
     # API Configuration
     api_key: str
+    base_url: Optional[str] = None  # LLAMA_CLOUD_BASE_URL, e.g. llamaparse_stub.py
+    
+    # Backend: "llamaparse" (remote), "pypdfium2" / "pypdf2" to extract the
+    # PDF's text layer locally (no network, no images or OCR), or "docling"
+    # (local layout analysis + Tesseract OCR, see docling_parser.py)
+    backend: str = "llamaparse"
+    local_workers: Optional[int] = None  # Local extraction processes (None: one per CPU)
+    
+    # Docling Settings: page ranges converted in parallel CPU-only processes
+    docling_workers: int = 2
+    docling_pages_per_range: int = 8
+    docling_worker_memory_mb: int = 0  # Address-space cap per worker (0: none)
+    docling_ocr_lang: str = "fas"
     
     # Parsing Settings
     max_pages: int = 25
@@ -50,6 +63,24 @@ class ParserSettings:
     
     # Language Settings (optional)
     languages: Optional[list] = None
+    
+    # Concurrency Settings
+    max_concurrent_jobs: int = 4  # PDFs parsed at once in batch mode
+    
+    # Cache Settings
+    use_parse_cache: bool = True  # Only send new or edited pages to LlamaParse
+    
+    # Image Download: concurrent, stored once per distinct content (see image_store.py)
+    image_download_concurrency: int = 8
+    
+    # OCR Triage: extract every page's text layer locally and send only pages
+    # whose text layer is poor to LlamaParse (see ocr_triage.py)
+    ocr_triage: bool = False
+    triage_extractor: str = "pypdf2"  # Local backend used for the text layer
+    triage_min_chars: int = 200
+    triage_min_persian_ratio: float = 0.5
+    triage_max_garbage_ratio: float = 0.05
+    triage_max_run_on_ratio: float = 0.1
 
 
 @dataclass
@@ -60,6 +91,51 @@ class OpenAISettings:
     api_key: str
     embedding_model: str = "text-embedding-3-small"
     chat_model: str = "gpt-4o-mini"
+    base_url: Optional[str] = None  # e.g. http://127.0.0.1:8001/v1 for openai_stub.py
+
+
+@dataclass
+class RetrievalSettings:
+    """Query-time retrieval settings"""
+    
+    # Vector backend: "default" (LlamaIndex storage in out/semantic_index) or
+    # "numpy" (memory-mapped out/semantic_vectors, falls back to the default
+    # storage until make_semantic_index.py has written it)
+    vector_backend: str = "default"
+    vector_dtype: str = "float32"  # or "float16" to halve the matrix size
+    similarity_top_k: int = 5
+    
+    # Retrieval mode: "vector", "hybrid" (BM25 + vector, RRF-fused) or
+    # "lexical" (BM25 only, no embedding call); the BM25 modes fall back to
+    # "vector" until make_semantic_index.py has written out/semantic_bm25
+    retrieval_mode: str = "vector"
+    lexical_max_terms: int = 2  # hybrid: queries this short go BM25-only
+    
+    # Node granularity: "semantic" (topic-level chunks) or "sentence_window"
+    # (retrieve single sentences, expand each hit to its window for the answer)
+    node_type: str = "semantic"
+    
+    # Answer cache: exact normalized-question tier + embedding-similarity tier
+    query_cache_size: int = 1024  # 0 disables the cache
+    query_cache_ttl: float = 3600.0  # seconds
+    semantic_cache_threshold: float = 0.95  # cosine; 1.0 disables the semantic tier
+    
+    stream_responses: bool = False  # True: REPL prints answer tokens as they arrive
+
+
+@dataclass
+class ServiceSettings:
+    """HTTP query service settings"""
+    
+    host: str = "127.0.0.1"
+    port: int = 8000
+    
+    # Embedding micro-batching: one request covers the questions that arrive
+    # within embed_batch_wait_ms of each other (up to embed_batch_size)
+    embed_batch_size: int = 32
+    embed_batch_wait_ms: float = 10.0
+    
+    max_concurrent_llm: int = 4  # Chat completions in flight at once
 
 
 @dataclass
@@ -68,8 +144,11 @@ class PathSettings:
     
     input_pdf: str = "./input.pdf"
     output_markdown: str = "./out/output.md"
-    output_json: str = "./out/output.json"
+    output_jsonl: str = "./out/output.jsonl"
     output_images_dir: str = "./out/images"
+    output_shards_dir: str = "./out/shards"
+    output_docling_json: str = "./out/docling.json"
+    parse_cache_dir: str = "./out/parse_cache"
 
 
 def load_settings_from_env() -> ParserSettings:
@@ -82,8 +161,10 @@ def load_settings_from_env() -> ParserSettings:
     Raises:
         ValueError: If required environment variables are missing
     """
-    api_key = os.getenv("LLAMA_CLOUD_API_KEY")
-    if not api_key:
+    backend = os.getenv("PARSER_BACKEND", "llamaparse").lower()
+    local_workers = os.getenv("LOCAL_PARSE_WORKERS")
+    api_key = os.getenv("LLAMA_CLOUD_API_KEY", "")
+    if not api_key and backend == "llamaparse":
         raise ValueError(
             "LLAMA_CLOUD_API_KEY not found. "
             "Either:\n"
@@ -93,8 +174,24 @@ def load_settings_from_env() -> ParserSettings:
     
     return ParserSettings(
         api_key=api_key,
+        base_url=os.getenv("LLAMA_CLOUD_BASE_URL") or None,
+        backend=backend,
+        local_workers=int(local_workers) if local_workers else None,
+        docling_workers=int(os.getenv("DOCLING_WORKERS", "2")),
+        docling_pages_per_range=int(os.getenv("DOCLING_PAGES_PER_RANGE", "8")),
+        docling_worker_memory_mb=int(os.getenv("DOCLING_WORKER_MEMORY_MB", "0")),
+        docling_ocr_lang=os.getenv("DOCLING_OCR_LANG", "fas"),
         max_pages=int(os.getenv("MAX_PAGES", "25")),
         high_res_ocr=os.getenv("HIGH_RES_OCR", "true").lower() == "true",
+        max_concurrent_jobs=int(os.getenv("MAX_CONCURRENT_JOBS", "4")),
+        use_parse_cache=os.getenv("PARSE_CACHE", "true").lower() == "true",
+        image_download_concurrency=int(os.getenv("IMAGE_DOWNLOAD_CONCURRENCY", "8")),
+        ocr_triage=os.getenv("OCR_TRIAGE", "false").lower() == "true",
+        triage_extractor=os.getenv("TRIAGE_EXTRACTOR", "pypdf2").lower(),
+        triage_min_chars=int(os.getenv("TRIAGE_MIN_CHARS", "200")),
+        triage_min_persian_ratio=float(os.getenv("TRIAGE_MIN_PERSIAN_RATIO", "0.5")),
+        triage_max_garbage_ratio=float(os.getenv("TRIAGE_MAX_GARBAGE_RATIO", "0.05")),
+        triage_max_run_on_ratio=float(os.getenv("TRIAGE_MAX_RUN_ON_RATIO", "0.1")),
     )
 
 
@@ -126,5 +223,43 @@ def load_openai_settings() -> OpenAISettings:
         api_key=api_key,
         embedding_model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
         chat_model=os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini"),
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
     )
 
+
+
+def load_retrieval_settings() -> RetrievalSettings:
+    """
+    Load retrieval settings from environment variables or .env file
+    
+    Returns:
+        RetrievalSettings instance with values from environment
+    """
+    return RetrievalSettings(
+        vector_backend=os.getenv("VECTOR_BACKEND", "default").lower(),
+        vector_dtype=os.getenv("VECTOR_DTYPE", "float32").lower(),
+        similarity_top_k=int(os.getenv("SIMILARITY_TOP_K", "5")),
+        retrieval_mode=os.getenv("RETRIEVAL_MODE", "vector").lower(),
+        lexical_max_terms=int(os.getenv("LEXICAL_MAX_TERMS", "2")),
+        node_type=os.getenv("NODE_TYPE", "semantic").lower(),
+        query_cache_size=int(os.getenv("QUERY_CACHE_SIZE", "1024")),
+        query_cache_ttl=float(os.getenv("QUERY_CACHE_TTL", "3600")),
+        semantic_cache_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+        stream_responses=os.getenv("STREAM_RESPONSES", "false").lower() == "true",
+    )
+
+
+def load_service_settings() -> ServiceSettings:
+    """
+    Load HTTP service settings from environment variables or .env file
+    
+    Returns:
+        ServiceSettings instance with values from environment
+    """
+    return ServiceSettings(
+        host=os.getenv("SERVICE_HOST", "127.0.0.1"),
+        port=int(os.getenv("SERVICE_PORT", "8000")),
+        embed_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "32")),
+        embed_batch_wait_ms=float(os.getenv("EMBED_BATCH_WAIT_MS", "10")),
+        max_concurrent_llm=int(os.getenv("MAX_CONCURRENT_LLM", "4")),
+    )
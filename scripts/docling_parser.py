@@ -0,0 +1,246 @@
+"""
+Docling PDF Parser
+
+Local, layout-aware parsing with docling (Tesseract OCR for Persian). One
+converter over a whole book keeps every page's layout data in a single
+process, so memory grows with the book; here the PDF is cut into page
+ranges of at most docling_pages_per_range pages, converted in CPU-only
+worker processes and merged back in page order.
+
+Each worker builds its converters once, runs with
+cpu_count / docling_workers torch threads, can be capped at
+docling_worker_memory_mb of address space and is replaced after
+RANGES_PER_WORKER ranges so memory docling doesn't release is returned.
+With ocr_triage enabled, only the ranges whose text layer is poor (see
+ocr_triage.py) are converted with OCR.
+
+Usage:
+    PARSER_BACKEND=docling python pdf_parser.py
+"""
+
+import os
+import resource
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import PdfPipelineOptions, TesseractCliOcrOptions
+from docling.document_converter import DocumentConverter, PdfFormatOption
+
+from config import ParserSettings
+from biology_textbook import get_chapter_and_lecture_by_page
+from local_pdf_parser import LocalPDFParser, count_pages
+from ocr_triage import PageQuality, page_runs, triage_pages
+from rtl_fix import fix_rtl_text
+
+RANGES_PER_WORKER = 4  # بعد از این تعداد بازه، پروسس کارگر تازه می‌شود
+
+# (first_page, last_page, do_ocr)
+PageRange = Tuple[int, int, bool]
+
+# --- per-worker state ---
+_converters: Dict[bool, DocumentConverter] = {}
+_worker_config: Dict[str, Any] = {}
+
+
+def make_converter(do_ocr: bool, ocr_lang: List[str], num_threads: int) -> DocumentConverter:
+    """
+    Create a CPU-only docling converter
+
+    Args:
+        do_ocr: Run Tesseract OCR on the pages
+        ocr_lang: Tesseract languages, e.g. ["fas"]
+        num_threads: Torch threads for the layout model
+
+    Returns:
+        DocumentConverter for PDFs
+    """
+    ocr_opts = TesseractCliOcrOptions()
+    ocr_opts.lang = ocr_lang
+
+    pipeline_opts = PdfPipelineOptions()
+    pipeline_opts.do_ocr = do_ocr
+    pipeline_opts.ocr_options = ocr_opts
+
+    # سنگینی layout/table رو کم کن (برای رفع هنگ مفید)
+    pipeline_opts.do_table_structure = False
+
+    # اجباراً CPU تا وارد MPS/CUDA نشه
+    pipeline_opts.accelerator_options = AcceleratorOptions(
+        device=AcceleratorDevice.CPU, num_threads=num_threads
+    )
+
+    return DocumentConverter(
+        format_options={
+            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_opts)
+        }
+    )
+
+
+def _init_worker(ocr_lang: List[str], num_threads: int, memory_mb: int) -> None:
+    if memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _worker_config.update(ocr_lang=ocr_lang, num_threads=num_threads)
+
+
+def book_page_numbers(page_numbers: Iterable[int], first: int, last: int) -> Dict[int, int]:
+    """
+    Map the page numbers of a range conversion onto the book's page numbers
+
+    docling keeps the absolute page numbers of a page_range conversion; if
+    the document's pages are not all within the range (e.g. a version that
+    numbers them from 1), they are mapped by position instead.
+
+    Args:
+        page_numbers: Page numbers of the converted document
+        first: First page of the range (1-based)
+        last: Last page of the range
+
+    Returns:
+        {document page number: book page number}
+
+    Raises:
+        ValueError: If the document has more pages than the range
+    """
+    page_numbers = sorted(page_numbers)
+    if all(first <= page_no <= last for page_no in page_numbers):
+        return {page_no: page_no for page_no in page_numbers}
+    if len(page_numbers) > last - first + 1:
+        raise ValueError(
+            f"Conversion of pages {first}-{last} returned {len(page_numbers)} pages"
+        )
+    return {page_no: first + i for i, page_no in enumerate(page_numbers)}
+
+
+def convert_range(task: Tuple[str, PageRange]) -> Dict[str, Any]:
+    """
+    Worker: convert one page range of a PDF
+
+    Args:
+        task: (pdf_path, (first_page, last_page, do_ocr))
+
+    Returns:
+        {"first_page", "last_page", "ocr", "pages": {page: markdown},
+        "document": docling dict}; markdown is RTL-fixed
+    """
+    pdf_path, (first, last, do_ocr) = task
+    if do_ocr not in _converters:
+        _converters[do_ocr] = make_converter(
+            do_ocr, _worker_config.get("ocr_lang", ["fas"]), _worker_config.get("num_threads", 1)
+        )
+    doc = _converters[do_ocr].convert(pdf_path, page_range=(first, last)).document
+
+    return {
+        "first_page": first,
+        "last_page": last,
+        "ocr": do_ocr,
+        "pages": {
+            str(book_page): fix_rtl_text(doc.export_to_markdown(page_no=page_no))
+            for page_no, book_page in book_page_numbers(doc.pages, first, last).items()
+        },
+        "document": doc.export_to_dict(),
+    }
+
+
+class DoclingPDFParser:
+    """Docling conversion of page ranges in parallel worker processes"""
+
+    def __init__(self, settings: ParserSettings):
+        """
+        Initialize the docling parser
+
+        Args:
+            settings: ParserSettings with the docling_* (and triage_*) settings
+        """
+        self.settings = settings
+
+    def plan_ranges(self, pdf_path: str) -> List[PageRange]:
+        """
+        Cut a PDF into page ranges of at most docling_pages_per_range pages
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Returns:
+            (first_page, last_page, do_ocr) ranges in page order; without
+            ocr_triage every range is OCRed
+        """
+        if self.settings.ocr_triage:
+            local = LocalPDFParser(self.settings, backend=self.settings.triage_extractor)
+            qualities = triage_pages(local.extract_texts(pdf_path), self.settings)
+        else:
+            total_pages = count_pages(pdf_path, self.settings.triage_extractor)
+            qualities = [PageQuality(page, 0, 0.0, 0.0, 0.0, True) for page in range(1, total_pages + 1)]
+        return page_runs(qualities, self.settings.docling_pages_per_range)
+
+    def iter_ranges(self, pdf_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Convert every page range, yielding results in page order
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Yields:
+            convert_range results
+        """
+        ranges = self.plan_ranges(pdf_path)
+        ocr_ranges = sum(1 for _, _, do_ocr in ranges if do_ocr)
+        workers = max(1, min(self.settings.docling_workers, len(ranges)))
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+        print(
+            f"🧩 Converting {len(ranges)} page ranges ({ocr_ranges} with OCR) "
+            f"in {workers} processes, {num_threads} threads each"
+        )
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                [self.settings.docling_ocr_lang],
+                num_threads,
+                self.settings.docling_worker_memory_mb,
+            ),
+            max_tasks_per_child=RANGES_PER_WORKER,
+        ) as pool:
+            yield from pool.map(convert_range, [(pdf_path, r) for r in ranges])
+
+    def parse_pdf(self, pdf_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Parse a PDF into page records and docling documents
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Returns:
+            Tuple of ({"pages": {...}} in the PDFParser.build_json_result
+            schema, list of {"first_page", "last_page", "ocr", "document"}
+            per range in page order)
+
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+
+        json_result = {"pages": {}}
+        documents = []
+        for result in self.iter_ranges(pdf_path):
+            for page_key, md in result.pop("pages").items():
+                page = int(page_key)
+                chapter_lecture_info = get_chapter_and_lecture_by_page(page)
+                json_result["pages"][page_key] = {
+                    "page": page,
+                    "text": md,
+                    "md": md,
+                    "images": [],
+                    "layout": None,
+                    "structuredData": None,
+                    "chapter": chapter_lecture_info["chapter"] if chapter_lecture_info else None,
+                    "lecture": chapter_lecture_info["lecture"] if chapter_lecture_info else None
+                }
+            documents.append(result)
+
+        print(f"  ✓ Processed {len(json_result['pages'])} pages")
+        return json_result, documents
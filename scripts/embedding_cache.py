@@ -0,0 +1,303 @@
+"""
+Persistent Embedding Cache
+
+SQLite-backed cache of embedding vectors keyed by (model name, hash of the
+normalized text), wrapped around any LlamaIndex embedding model so
+make_semantic_nodes.py and make_semantic_index.py never pay twice for the
+same text. Also provides a deterministic local embedding model for offline
+runs and tests.
+"""
+
+import asyncio
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import PrivateAttr
+
+from config import OpenAISettings
+
+LOCAL_EMBEDDING_MODEL = "local-hash"
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace so trivial edits share a key"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_hash(text: str) -> bytes:
+    """SHA-256 digest of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()
+
+
+class EmbeddingStore:
+    """SQLite table of float32 vectors keyed by (model, text hash)"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open (or create) the cache database
+
+        Args:
+            path: SQLite file path
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: Sequence[bytes]) -> Dict[bytes, List[float]]:
+        """
+        Fetch cached vectors
+
+        Args:
+            model: Embedding model name
+            hashes: Text hashes to look up
+
+        Returns:
+            Mapping of hash to vector for the hashes that are cached
+        """
+        found: Dict[bytes, List[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk],
+                )
+                for key, blob in rows:
+                    found[bytes(key)] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model: str, items: Dict[bytes, List[float]]) -> None:
+        """
+        Store vectors as float32 blobs
+
+        Args:
+            model: Embedding model name
+            items: Mapping of text hash to vector
+        """
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, key, array("f", vector).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Embedding model wrapper that serves repeated texts from an EmbeddingStore"""
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _store: EmbeddingStore = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, store: EmbeddingStore, **kwargs):
+        """
+        Wrap an embedding model
+
+        Args:
+            inner: Embedding model that computes cache misses
+            store: Vector cache shared by all scripts
+        """
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs,
+        )
+        self._inner = inner
+        self._store = store
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    def _lookup(self, model: str, texts: List[str]):
+        hashes = [text_hash(t) for t in texts]
+        cached = self._store.get_many(model, hashes)
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        return hashes, cached, missing
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        hashes, cached, missing = self._lookup(self.model_name, texts)
+        if missing:
+            vectors = self._inner.get_text_embedding_batch(list(missing.values()))
+            fresh = dict(zip(missing, vectors))
+            self._store.put_many(self.model_name, fresh)
+            cached.update(fresh)
+        return [cached[key] for key in hashes]
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        hashes, cached, missing = self._lookup(self.model_name, texts)
+        if missing:
+            vectors = await self._inner.aget_text_embedding_batch(list(missing.values()))
+            fresh = dict(zip(missing, vectors))
+            self._store.put_many(self.model_name, fresh)
+            cached.update(fresh)
+        return [cached[key] for key in hashes]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    @property
+    def _query_model(self) -> str:
+        # Some models embed queries differently from documents, keep them apart
+        return f"{self.model_name}:query"
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        hashes, cached, missing = self._lookup(self._query_model, [query])
+        if missing:
+            cached[hashes[0]] = self._inner.get_query_embedding(query)
+            self._store.put_many(self._query_model, {hashes[0]: cached[hashes[0]]})
+        return cached[hashes[0]]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        hashes, cached, missing = self._lookup(self._query_model, [query])
+        if missing:
+            cached[hashes[0]] = await self._inner.aget_query_embedding(query)
+            self._store.put_many(self._query_model, {hashes[0]: cached[hashes[0]]})
+        return cached[hashes[0]]
+
+    async def _aget_query_embeddings(self, queries: List[str]) -> List[List[float]]:
+        hashes, cached, missing = self._lookup(self._query_model, queries)
+        if missing:
+            vectors = await aget_query_embedding_batch(self._inner, list(missing.values()))
+            fresh = dict(zip(missing, vectors))
+            self._store.put_many(self._query_model, fresh)
+            cached.update(fresh)
+        return [cached[key] for key in hashes]
+
+
+async def aget_query_embedding_batch(model: BaseEmbedding, queries: List[str]) -> List[List[float]]:
+    """
+    Query embeddings of several texts, in as few requests as the model allows
+
+    BaseEmbedding only batches document embeddings, which some models
+    compute differently from query embeddings, so this dispatches on the
+    model: OpenAI gets a single request to its query engine, CachedEmbedding
+    batches its misses under the query cache key, anything else is
+    embedded query by query.
+
+    Args:
+        model: Embedding model (possibly wrapped in CachedEmbedding)
+        queries: Query texts
+
+    Returns:
+        One vector per query, in order
+    """
+    if isinstance(model, CachedEmbedding):
+        return await model._aget_query_embeddings(queries)
+    if type(model).__name__ == "OpenAIEmbedding":
+        from llama_index.embeddings.openai.base import aget_embeddings
+
+        @model._create_retry_decorator()
+        async def _request() -> List[List[float]]:
+            return await aget_embeddings(
+                model._get_aclient(),
+                queries,
+                engine=model._query_engine,
+                **model.additional_kwargs,
+            )
+
+        return await _request()
+    return await asyncio.gather(*(model.aget_query_embedding(query) for query in queries))
+
+
+class HashEmbedding(BaseEmbedding):
+    """
+    Deterministic local embedding model (hashed bag of words)
+
+    Needs no network or API key; useful for offline runs, tests and
+    benchmarks. Texts sharing words get similar vectors.
+    """
+
+    dim: int = 256
+
+    def __init__(self, dim: int = 256, **kwargs):
+        super().__init__(model_name=f"{LOCAL_EMBEDDING_MODEL}-{dim}", dim=dim, **kwargs)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashEmbedding"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in _TOKEN.findall(normalize_text(text).lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+
+def build_embed_model(
+    openai_config: OpenAISettings,
+    cache_path: Optional[Union[str, Path]] = None
+) -> BaseEmbedding:
+    """
+    Create the embedding model used by the pipeline scripts
+
+    Args:
+        openai_config: OpenAI settings; an embedding_model of "local-hash"
+            selects the offline HashEmbedding instead of OpenAI
+        cache_path: SQLite cache file; None disables caching
+
+    Returns:
+        Embedding model, wrapped in CachedEmbedding when cache_path is given
+    """
+    if openai_config.embedding_model == LOCAL_EMBEDDING_MODEL:
+        model: BaseEmbedding = HashEmbedding()
+    else:
+        from llama_index.embeddings.openai import OpenAIEmbedding
+
+        model = OpenAIEmbedding(
+            model=openai_config.embedding_model,
+            api_key=openai_config.api_key,
+            api_base=openai_config.base_url,
+        )
+
+    if cache_path is None:
+        return model
+    return CachedEmbedding(model, EmbeddingStore(cache_path))
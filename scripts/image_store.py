@@ -0,0 +1,218 @@
+"""
+Image Download and Content-Addressed Storage
+
+Replacement for JobResult.get_image_documents(image_download_dir=...),
+which fetches a job's screenshots and object images one at a time and
+writes every copy to disk. Here images are fetched over one pooled aiohttp
+session with bounded concurrency and stored by the SHA-256 of their bytes:
+
+    <image_dir>/<sha[:2]>/<sha>.<ext>
+
+so a figure or logo repeated on many pages (or in many shards) is written
+once. The returned ImageDocuments carry the page number and the "sha256"
+and "image_name" of each image, so page records reference stored images
+instead of holding copies.
+
+Point LLAMA_CLOUD_BASE_URL at llamaparse_stub.py to run it offline.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+import aiohttp
+from llama_cloud_services.parse.base import DEFAULT_BASE_URL
+from llama_cloud_services.parse.types import PAGE_REGEX
+from llama_index.core.schema import ImageDocument
+
+IMAGE_ROUTE = "/api/v1/parsing/job/{job_id}/result/image/{name}"
+
+
+class ImageStore:
+    """Image files named by the SHA-256 of their content"""
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Store directory
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        self._claimed: set = set()
+
+    def path_for(self, digest: str, ext: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}{ext}")
+
+    def put(self, data: bytes, ext: str = "") -> Tuple[str, str, bool]:
+        """
+        Store image bytes unless identical bytes are already stored
+
+        Args:
+            data: Image content
+            ext: File extension including the dot, e.g. ".jpg"
+
+        Returns:
+            (sha256 hex digest, file path, whether the file was written)
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, ext)
+        # Claim the path so concurrent puts of the same bytes write it once
+        with self._lock:
+            if path in self._claimed or os.path.exists(path):
+                return digest, path, False
+            self._claimed.add(path)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename, so an interrupted run never leaves
+        # a partial file behind
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return digest, path, True
+
+
+@dataclass
+class DownloadStats:
+    """Counts of one download run"""
+    images: int = 0
+    stored: int = 0  # new files written
+    duplicates: int = 0  # images whose content was already stored
+    bytes_downloaded: int = 0
+
+
+class ImageDownloader:
+    """
+    Concurrent LlamaParse image download into an ImageStore
+
+    One aiohttp session (and connection pool) is opened on first use and
+    shared by every adownload() call, so concurrent callers together stay
+    within max_concurrency. Use it from a single event loop and aclose()
+    it when done (or use it as an async context manager).
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 8,
+        timeout: float = 60.0,
+        max_retries: int = 3
+    ):
+        """
+        Args:
+            api_key: LlamaCloud API key
+            base_url: API base URL (defaults to LlamaParse's)
+            max_concurrency: Maximum downloads in flight (and pooled connections)
+            timeout: Per-request timeout in seconds
+            max_retries: Attempts per image before giving up (timeouts,
+                connection errors, 429 and 5xx are retried; other 4xx fail)
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max(1, max_retries)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily: the session and semaphore belong to the running loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def aclose(self) -> None:
+        """Close the shared session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "ImageDownloader":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def _fetch(self, session: aiohttp.ClientSession, job_id: str, name: str) -> bytes:
+        url = self.base_url + IMAGE_ROUTE.format(job_id=job_id, name=name)
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    return await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Other 4xx responses (bad key, missing image) won't succeed on retry
+                retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status == 429 or e.status >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(2 ** (attempt - 1))
+
+    async def adownload(
+        self,
+        image_result: Any,
+        store: ImageStore,
+        include_screenshots: bool = True,
+        include_objects: bool = True
+    ) -> Tuple[List[ImageDocument], DownloadStats]:
+        """
+        Download a job's images into a store
+
+        Args:
+            image_result: LlamaParse JobResult of the image parser
+            store: Where to store the images
+            include_screenshots: Include page screenshots
+            include_objects: Include object images
+
+        Returns:
+            (ImageDocuments in page order, DownloadStats)
+        """
+        items = []
+        for page in image_result.pages:
+            for image in page.images:
+                is_screenshot = re.search(PAGE_REGEX, image.name) is not None
+                if (is_screenshot and include_screenshots) or (not is_screenshot and include_objects):
+                    items.append((page, image))
+
+        stats = DownloadStats(images=len(items))
+        session = self._get_session()
+        semaphore = self._semaphore
+
+        async def _download(page, image) -> ImageDocument:
+            async with semaphore:
+                data = await self._fetch(session, image_result.job_id, image.name)
+            ext = os.path.splitext(image.name)[1]
+            digest, path, written = await asyncio.to_thread(store.put, data, ext)
+            stats.bytes_downloaded += len(data)
+            if written:
+                stats.stored += 1
+            else:
+                stats.duplicates += 1
+            return ImageDocument(
+                image_path=path,
+                metadata={
+                    "page_number": page.page,
+                    "file_name": image_result.file_name,
+                    "image_name": image.name,
+                    "sha256": digest,
+                    "width": image.original_width,
+                    "height": image.original_height,
+                    "x": image.x,
+                    "y": image.y,
+                },
+                excluded_embed_metadata_keys=["width", "height", "x", "y", "sha256"],
+                excluded_llm_metadata_keys=["width", "height", "x", "y", "sha256"],
+            )
+
+        documents = await asyncio.gather(*(_download(page, image) for page, image in items))
+        return list(documents), stats
@@ -0,0 +1,85 @@
+"""
+Incremental Index Sync
+
+Brings a persisted VectorStoreIndex in line with the current node list by
+stable node id and content hash: new nodes are inserted, removed nodes are
+deleted and only changed nodes are re-embedded.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from llama_index.core import VectorStoreIndex
+from llama_index.core.schema import BaseNode
+
+
+@dataclass
+class SyncStats:
+    """What an incremental sync changed"""
+    added: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"+{self.added} added, ~{self.updated} updated, "
+            f"-{self.deleted} deleted, ={self.unchanged} unchanged"
+        )
+
+
+def indexed_node_hashes(index: VectorStoreIndex) -> Dict[str, str]:
+    """
+    Get the content hash of every node currently in the index
+
+    Args:
+        index: Loaded VectorStoreIndex
+
+    Returns:
+        Mapping of node id to stored content hash ("" if unknown)
+    """
+    docstore = index.docstore
+    return {
+        node_id: docstore.get_document_hash(node_id) or ""
+        for node_id in index.index_struct.nodes_dict
+    }
+
+
+def sync_index(index: VectorStoreIndex, nodes: Sequence[BaseNode]) -> SyncStats:
+    """
+    Apply the difference between the index and the current nodes
+
+    Args:
+        index: Loaded VectorStoreIndex to update in place
+        nodes: Current nodes, with stable ids (e.g. from make_semantic_nodes.py)
+
+    Returns:
+        SyncStats describing the changes
+    """
+    existing = indexed_node_hashes(index)
+    current = {node.node_id: node for node in nodes}
+    stats = SyncStats()
+
+    to_delete: List[str] = [node_id for node_id in existing if node_id not in current]
+    to_insert: List[BaseNode] = []
+
+    for node_id, node in current.items():
+        old_hash = existing.get(node_id)
+        if old_hash is None:
+            to_insert.append(node)
+            stats.added += 1
+        elif old_hash != node.hash:
+            to_delete.append(node_id)
+            to_insert.append(node)
+            stats.updated += 1
+        else:
+            stats.unchanged += 1
+
+    stats.deleted = len(to_delete) - stats.updated
+
+    if to_delete:
+        index.delete_nodes(to_delete, delete_from_docstore=True)
+    if to_insert:
+        # Only these nodes are sent to the embedding model
+        index.insert_nodes(to_insert)
+    return stats
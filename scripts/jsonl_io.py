@@ -0,0 +1,113 @@
+"""
+JSON Lines I/O
+
+Streaming read/write helpers for the pipeline artifacts (pages, nodes):
+one JSON record per line, so producers write records as they finish and
+consumers read them one at a time with flat memory.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Union
+
+PathLike = Union[str, Path]
+
+
+class JsonlWriter:
+    """Append-only JSON Lines writer, usable as a context manager"""
+
+    def __init__(self, path: PathLike):
+        """
+        Open a JSON Lines file for writing (truncates existing content)
+
+        Args:
+            path: Output file path (parent directories are created)
+        """
+        output_dir = os.path.dirname(str(path))
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self.path = str(path)
+        self.count = 0
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Write one record as a single line and flush it to disk"""
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_jsonl(path: PathLike, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    Write records to a JSON Lines file, one per line, as they are produced
+
+    Args:
+        path: Output file path
+        records: Iterable of JSON-serializable dicts
+
+    Returns:
+        Number of records written
+    """
+    with JsonlWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+        return writer.count
+
+
+def iter_jsonl(path: PathLike) -> Iterator[Dict[str, Any]]:
+    """Yield records from a JSON Lines file one at a time"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_records(path: PathLike) -> Iterator[Dict[str, Any]]:
+    """
+    Yield records from a pipeline artifact in either format
+
+    `.jsonl` files are streamed line by line. Legacy `.json` files are
+    loaded whole and may hold a list of records or a {"pages": {...}} dict.
+
+    Args:
+        path: Path to a .jsonl or .json artifact
+
+    Returns:
+        Iterator over the records
+    """
+    if str(path).endswith(".jsonl"):
+        yield from iter_jsonl(path)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "pages" in data:
+        yield from data["pages"].values()
+    else:
+        yield from data
+
+
+def artifact_path(out_dir: PathLike, stem: str) -> Path:
+    """
+    Resolve an artifact by stem, preferring the streaming `.jsonl` file
+
+    Args:
+        out_dir: Directory holding the artifacts
+        stem: File name without extension (e.g. "semantic_nodes")
+
+    Returns:
+        Path to `<stem>.jsonl` if it exists, otherwise `<stem>.json`
+    """
+    jsonl = Path(out_dir) / f"{stem}.jsonl"
+    return jsonl if jsonl.exists() else Path(out_dir) / f"{stem}.json"
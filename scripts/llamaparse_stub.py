@@ -0,0 +1,77 @@
+"""
+Local LlamaParse Image Endpoint Stub
+
+Serves `/api/v1/parsing/job/{job_id}/result/image/{name}` from a directory
+of image files, so image_store.py can be run and load-tested offline.
+Point the scripts at it with:
+
+    LLAMA_CLOUD_BASE_URL=http://127.0.0.1:8002
+
+The job id is ignored: every job sees the same files. GET /stats reports
+the requests served and the highest number of downloads in flight at once.
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from pathlib import Path
+
+from aiohttp import web
+
+STATS_KEY = web.AppKey("stats", Counter)
+IMAGE_DIR_KEY = web.AppKey("image_dir", Path)
+LATENCY_KEY = web.AppKey("latency", float)
+
+
+async def image(request: web.Request) -> web.Response:
+    stats = request.app[STATS_KEY]
+    stats["image_requests"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(request.app[LATENCY_KEY])
+        path = request.app[IMAGE_DIR_KEY] / request.match_info["name"]
+        if not path.is_file():
+            raise web.HTTPNotFound(text=f"No image {path.name}")
+        return web.Response(body=path.read_bytes(), content_type="image/jpeg")
+    finally:
+        stats["in_flight"] -= 1
+
+
+async def stats(request: web.Request) -> web.Response:
+    return web.json_response(dict(request.app[STATS_KEY]))
+
+
+def create_app(image_dir: Path, latency_ms: float = 0.0) -> web.Application:
+    """
+    Build the stub application
+
+    Args:
+        image_dir: Directory whose files are served by name
+        latency_ms: Simulated latency per image request
+
+    Returns:
+        aiohttp Application
+    """
+    app = web.Application()
+    app[STATS_KEY] = Counter()
+    app[IMAGE_DIR_KEY] = image_dir
+    app[LATENCY_KEY] = latency_ms / 1000.0
+    app.router.add_get("/api/v1/parsing/job/{job_id}/result/image/{name}", image)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the LlamaParse image endpoint")
+    parser.add_argument("image_dir", type=Path, help="Directory of images to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated latency per image")
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.image_dir, args.latency_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Local PDF Text Extraction
+
+Offline alternative to LlamaParse for PDFs with a usable text layer: page
+text is extracted with pypdfium2 or PyPDF2 across a process pool, cleaned
+up (backspaces, runs of spaces and blank lines) and emitted in the same
+page-record schema as PDFParser.build_json_result. There are no images and
+no OCR, so scanned pages come out empty.
+
+PyPDF2 returns the words of Persian lines in visual (left-to-right) order,
+so its text goes through rtl_fix. pdfium returns logical order, but only
+emits the spaces the PDF encodes: on PDFs that place each word separately
+(such as the textbook's input.pdf) most word separators are lost and long
+runs of words come out glued together, and neither backend keeps ZWNJ
+half-spaces (PyPDF2 turns them into spaces, pdfium drops them). PyPDF2 is
+therefore the default for OCR triage, which flags run-on text (see
+ocr_triage.py).
+
+Usage:
+    PARSER_BACKEND=pypdf2 python pdf_parser.py
+"""
+
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pypdfium2 as pdfium
+from PyPDF2 import PdfReader
+
+from config import ParserSettings
+from biology_textbook import get_chapter_and_lecture_by_page
+from rtl_fix import fix_rtl_text
+
+LOCAL_BACKENDS = ("pypdfium2", "pypdf2")
+
+# Whether a backend's text needs RTL word-order repair (pdfium's is in
+# logical order, though it may be missing word separators)
+_NEEDS_RTL_FIX = {"pypdfium2": False, "pypdf2": True}
+
+_SPACES = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def clean_page_text(raw: str, rtl_fix: bool = False) -> str:
+    """
+    Clean up extracted page text
+
+    Args:
+        raw: Text as returned by the extractor
+        rtl_fix: Also reverse the word order of RTL lines (see rtl_fix.py)
+
+    Returns:
+        Text with backspaces turned into spaces, \\r\\n into \\n, runs of
+        spaces/tabs collapsed and at most one blank line in a row
+    """
+    text = raw.replace("\x08", " ").replace("\r\n", "\n")
+    text = _SPACES.sub(" ", text)
+    text = _BLANK_LINES.sub("\n\n", text).strip()
+    return fix_rtl_text(text) if rtl_fix else text
+
+
+def _extract_pypdfium2(pdf_path: str, first: int, last: int) -> List[str]:
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        texts = []
+        for i in range(first - 1, last):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_bounded())
+            textpage.close()
+            page.close()
+        return texts
+    finally:
+        pdf.close()
+
+
+def _extract_pypdf2(pdf_path: str, first: int, last: int) -> List[str]:
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(first - 1, last)]
+
+
+def extract_page_range(task: Tuple[str, str, int, int]) -> List[str]:
+    """
+    Worker: extract and clean the text of a page range (1-based, inclusive)
+
+    The PDF is opened once per range, not once per page.
+
+    Args:
+        task: (backend, pdf_path, first_page, last_page)
+
+    Returns:
+        Cleaned text of each page in the range
+    """
+    backend, pdf_path, first, last = task
+    extract = _extract_pypdfium2 if backend == "pypdfium2" else _extract_pypdf2
+    return [clean_page_text(raw, _NEEDS_RTL_FIX[backend]) for raw in extract(pdf_path, first, last)]
+
+
+def count_pages(pdf_path: str, backend: str) -> int:
+    """Number of pages in a PDF, read with the given backend"""
+    if backend == "pypdfium2":
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    return len(PdfReader(pdf_path).pages)
+
+
+def plan_page_ranges(total_pages: int, workers: int, ranges_per_worker: int = 4) -> List[Tuple[int, int]]:
+    """
+    Split pages 1..total_pages into contiguous (first, last) ranges
+
+    A few ranges per worker keep the pool balanced when some pages are
+    much slower to extract than others.
+    """
+    if total_pages <= 0:
+        return []
+    size = max(1, math.ceil(total_pages / (workers * ranges_per_worker)))
+    return [(first, min(first + size - 1, total_pages)) for first in range(1, total_pages + 1, size)]
+
+
+class LocalPDFParser:
+    """Text-layer PDF extraction with pypdfium2 or PyPDF2, in a process pool"""
+
+    def __init__(self, settings: ParserSettings, backend: Optional[str] = None):
+        """
+        Initialize the local parser
+
+        Args:
+            settings: ParserSettings
+            backend: One of LOCAL_BACKENDS (defaults to settings.backend)
+
+        Raises:
+            ValueError: If the backend is not a local backend
+        """
+        backend = backend or settings.backend
+        if backend not in LOCAL_BACKENDS:
+            raise ValueError(
+                f"Unknown local parser backend {backend!r} "
+                f"(expected one of {', '.join(LOCAL_BACKENDS)})"
+            )
+        self.settings = settings
+        self.backend = backend
+
+    def extract_texts(self, pdf_path: str, workers: Optional[int] = None) -> Iterator[str]:
+        """
+        Yield the cleaned text of every page, in page order
+
+        Args:
+            pdf_path: Path to the PDF file
+            workers: Processes to use (defaults to settings.local_workers;
+                1 extracts in this process)
+
+        Yields:
+            Page texts, page 1 first
+        """
+        backend = self.backend
+        workers = workers or self.settings.local_workers or os.cpu_count() or 1
+        tasks = [
+            (backend, pdf_path, first, last)
+            for first, last in plan_page_ranges(count_pages(pdf_path, backend), workers)
+        ]
+        if workers == 1:
+            for task in tasks:
+                yield from extract_page_range(task)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for texts in pool.map(extract_page_range, tasks):
+                yield from texts
+
+    def iter_page_records(self, pdf_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield one page record at a time, as PDFParser.iter_page_records does
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Yields:
+            Page dictionaries including chapter and lecture info; "md" is
+            the plain page text and "images" is always empty
+        """
+        for i, text in enumerate(self.extract_texts(pdf_path), 1):
+            chapter_lecture_info = get_chapter_and_lecture_by_page(i)
+            yield {
+                "page": i,
+                "text": text,
+                "md": text,
+                "images": [],
+                "layout": None,
+                "structuredData": None,
+                "chapter": chapter_lecture_info["chapter"] if chapter_lecture_info else None,
+                "lecture": chapter_lecture_info["lecture"] if chapter_lecture_info else None
+            }
+
+    def build_json_result(self, pdf_path: str) -> Dict[str, Any]:
+        """
+        Build the {"pages": {...}} result of PDFParser.build_json_result
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Returns:
+            Dictionary with structured page data including chapter and lecture info
+        """
+        print(f"🔧 Extracting text locally with {self.backend}...")
+        json_result = {"pages": {}}
+        for page_data in self.iter_page_records(pdf_path):
+            json_result["pages"][str(page_data["page"])] = page_data
+
+        print(f"  ✓ Processed {len(json_result['pages'])} pages")
+        return json_result
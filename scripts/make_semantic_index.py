@@ -1,37 +1,50 @@
-import json
+import sys
 from pathlib import Path
 
-from llama_index.core import VectorStoreIndex, Settings
+from llama_index.core import (
+    Settings,
+    StorageContext,
+    VectorStoreIndex,
+    load_index_from_storage,
+)
 from llama_index.core.schema import TextNode
 from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
 
-from config import load_openai_settings
+from bm25_index import build_bm25_index
+from config import load_openai_settings, load_retrieval_settings
+from embedding_cache import build_embed_model
+from index_sync import sync_index
+from jsonl_io import artifact_path, iter_records
+from numpy_vector_store import export_numpy_store
+from sentence_windows import SentenceStore
+from side_table import node_record
 
 BASE_DIR = Path(__file__).parent
 OUT_DIR = BASE_DIR / "out"
 STORAGE_DIR = BASE_DIR / "out/semantic_index"
-STORAGE_DIR.mkdir(exist_ok=True)
+VECTORS_DIR = BASE_DIR / "out/semantic_vectors"
+BM25_DIR = BASE_DIR / "out/semantic_bm25"
+SENTENCE_STORE_DIR = BASE_DIR / "out/sentence_store"
+SENTENCE_STORAGE_DIR = BASE_DIR / "out/sentence_index"
+SENTENCE_VECTORS_DIR = BASE_DIR / "out/sentence_vectors"
+SENTENCE_BM25_DIR = BASE_DIR / "out/sentence_bm25"
 
 # 1) Load config
 openai_config = load_openai_settings()
+retrieval_config = load_retrieval_settings()
 
 Settings.llm = OpenAI(
     model=openai_config.chat_model,   # مثلاً gpt-4.1-mini
     api_key=openai_config.api_key,
+    api_base=openai_config.base_url,
 )
 
-Settings.embed_model = OpenAIEmbedding(
-    model=openai_config.embedding_model,  # مثلاً text-embedding-3-small
-    api_key=openai_config.api_key,
-)
-
-# 2) Load semantic_nodes.json
-with open(OUT_DIR / "semantic_nodes.json", "r", encoding="utf-8") as f:
-    nodes_json = json.load(f)
+# مثلاً text-embedding-3-small، با کش دیسکی مشترک با make_semantic_nodes.py
+Settings.embed_model = build_embed_model(openai_config, OUT_DIR / "embedding_cache.sqlite")
 
+# 2) Load semantic nodes (semantic_nodes.jsonl, or legacy semantic_nodes.json)
 nodes = []
-for item in nodes_json:
+for item in iter_records(artifact_path(OUT_DIR, "semantic_nodes")):
     node = TextNode(
         text=item["text"],
         id_=item["node_id"],
@@ -41,10 +54,43 @@ for item in nodes_json:
     )
     nodes.append(node)
 
-# 3) ساخت Index
-index = VectorStoreIndex(nodes)
 
-# 4) ذخیره برای استفاده بعدی
-index.storage_context.persist(persist_dir=str(STORAGE_DIR))
 
-print("✅ semantic index for bio10 created and stored in", STORAGE_DIR)
\ No newline at end of file
+def build_index(nodes, storage_dir: Path, vectors_dir: Path, bm25_dir: Path, name: str) -> None:
+    """ساخت/به‌روزرسانی ایندکس برداری، خروجی NumPy و BM25 برای یک مجموعه نود"""
+    # 3) ساخت Index: اگر ایندکس قبلی هست فقط تغییرات را اعمال کن (--rebuild برای ساخت کامل)
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    if (storage_dir / "docstore.json").exists() and "--rebuild" not in sys.argv:
+        storage_context = StorageContext.from_defaults(persist_dir=str(storage_dir))
+        index = load_index_from_storage(storage_context=storage_context)
+        stats = sync_index(index, nodes)
+        print(f"🔄 {name}: incremental update: {stats}")
+    else:
+        index = VectorStoreIndex(nodes)
+
+    # 4) ذخیره برای استفاده بعدی
+    index.storage_context.persist(persist_dir=str(storage_dir))
+
+    print(f"✅ {name} index for bio10 created and stored in", storage_dir)
+
+    # 5) خروجی ماتریس NumPy (mmap) برای semantic_query.py
+    count = export_numpy_store(index, vectors_dir, dtype=retrieval_config.vector_dtype)
+    print(f"✅ {count} vectors exported to", vectors_dir)
+
+    # 6) ایندکس BM25 محلی (جستجوی واژه‌ای بدون فراخوانی embedding)
+    count = build_bm25_index((node_record(node) for node in nodes), bm25_dir)
+    print(f"✅ BM25 index over {count} nodes stored in", bm25_dir)
+
+
+build_index(nodes, STORAGE_DIR, VECTORS_DIR, BM25_DIR, "semantic")
+
+# 7) ایندکس دوم در سطح جمله (برای NODE_TYPE=sentence_window در semantic_query.py)؛
+#    نودها فقط جمله را دارند و پنجره هنگام پاسخ از out/sentence_store ساخته می‌شود
+window_path = artifact_path(OUT_DIR, "sentence_window_nodes")
+window_records = list(iter_records(window_path)) if window_path.exists() else []
+if window_records and "page_row" not in window_records[0]:
+    print("⚠️ sentence_window_nodes is in the old format, run make_semantic_nodes.py again")
+elif window_records and (SENTENCE_STORE_DIR / "offsets.npy").exists():
+    with SentenceStore(SENTENCE_STORE_DIR) as sentence_store:
+        sentence_nodes = [sentence_store.window_node(record) for record in window_records]
+    build_index(sentence_nodes, SENTENCE_STORAGE_DIR, SENTENCE_VECTORS_DIR, SENTENCE_BM25_DIR, "sentence")
@@ -1,85 +1,98 @@
-import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
+from typing import Any, Dict, List
 
 from llama_index.core import Document
-from llama_index.core.node_parser import (
-    SemanticSplitterNodeParser,
-    SentenceWindowNodeParser,
-)
-from llama_index.embeddings.openai import OpenAIEmbedding
 from config import load_openai_settings
+from embedding_cache import build_embed_model
+from jsonl_io import JsonlWriter, artifact_path, iter_records
+from semantic_splitter import BatchedSemanticSplitter, split_sentences
+from sentence_windows import compact_window_records
+from side_table import SideTableWriter
 
 # --- تنظیمات اولیه مسیرها ---
 OUT_DIR = Path("out")
-OUT_DIR.mkdir(exist_ok=True)
-
-# --- 1) Load OpenAI config ---
-openai_config = load_openai_settings()
-
-embed_model = OpenAIEmbedding(
-    model=openai_config.embedding_model,
-    api_key=openai_config.api_key,
-)
-
-# --- 2) تعریف پارسرها ---
-
-# پارسر معنایی (چانک‌های بزرگ‌تر، topic-level)
-semantic_parser = SemanticSplitterNodeParser(
-    embed_model=embed_model,
-    breakpoint_threshold_type="percentile",   # یا "standard_deviation"
-    breakpoint_threshold_amount=0.95,         # هرچی پایین‌تر، چانک‌های ریزتر
-)
-
-# پارسر جمله + پنجره (sentence window)
-sentence_window_parser = SentenceWindowNodeParser.from_defaults(
-    window_size=3,                       # چند جمله قبل/بعد را در window نگه دارد
-    window_metadata_key="window",
-    original_text_metadata_key="original_text",
-)
-
-# --- 3) خواندن docs از out/docs.json ---
-with open(OUT_DIR / "nodes.json", "r", encoding="utf-8") as f:
-    docs_json = json.load(f)
-
-docs = [
-    Document(text=doc["text"], metadata=doc["metadata"])
-    for doc in docs_json
-]
-
-# --- 4) ساخت نودهای معنایی ---
-semantic_nodes = semantic_parser.get_nodes_from_documents(docs)
-
-semantic_nodes_json = [
-    {
-        "text": node.text,
-        "metadata": node.metadata,
-        "node_id": node.node_id,
-        "start_char_idx": node.start_char_idx,
-        "end_char_idx": node.end_char_idx,
-        "parser_type": "semantic",
-    }
-    for node in semantic_nodes
-]
-
-with open(OUT_DIR / "semantic_nodes.json", "w", encoding="utf-8") as f:
-    json.dump(semantic_nodes_json, f, ensure_ascii=False, indent=2)
-
-# --- 5) ساخت نودهای sentence window ---
-sentence_nodes = sentence_window_parser.get_nodes_from_documents(docs)
-
-sentence_nodes_json = [
-    {
-        "text": node.text,                 # جمله اصلی
-        "metadata": node.metadata,         # شامل "window" و "original_text"
-        "node_id": node.node_id,
-        "start_char_idx": node.start_char_idx,
-        "end_char_idx": node.end_char_idx,
-        "parser_type": "sentence_window",
-    }
-    for node in sentence_nodes
-]
-
-with open(OUT_DIR / "sentence_window_nodes.json", "w", encoding="utf-8") as f:
-    json.dump(sentence_nodes_json, f, ensure_ascii=False, indent=2)
-
-print("✅ semantic_nodes.json and sentence_window_nodes.json created successfully.")
\ No newline at end of file
+SENTENCE_STORE_DIR = OUT_DIR / "sentence_store"
+
+WINDOW_SIZE = 3        # چند جمله قبل/بعد را در window نگه دارد
+DOCS_PER_BATCH = 64    # صفحه‌هایی که با هم embed می‌شوند
+
+
+def stable_page_id(metadata: dict) -> str:
+    """شناسهٔ پایدار صفحه (کتاب/پایه/صفحه)"""
+    return f"{metadata.get('book')}-{metadata.get('grade')}-p{metadata.get('page')}"
+
+
+def stable_node_id(metadata: dict, kind: str, position: int) -> str:
+    """شناسهٔ پایدار نود (کتاب/پایه/صفحه/ترتیب) تا ایندکس بتواند تغییرات را diff کند"""
+    return f"{stable_page_id(metadata)}-{kind}{position}"
+
+
+def split_page(doc: Dict[str, Any]) -> List[str]:
+    """کار هر پروسس: جمله‌بندی یک صفحه (فقط یک بار، برای هر دو پارسر)"""
+    return split_sentences(doc["text"])
+
+
+def main():
+    OUT_DIR.mkdir(exist_ok=True)
+
+    # --- 1) Load OpenAI config ---
+    openai_config = load_openai_settings()
+
+    # Embeddings are cached on disk, shared with make_semantic_index.py
+    embed_model = build_embed_model(openai_config, OUT_DIR / "embedding_cache.sqlite")
+
+    # --- 2) پارسر معنایی (چانک‌های بزرگ‌تر، topic-level) ---
+    # همان مرزهای SemanticSplitterNodeParser، ولی embedding چند صفحه با هم و فاصله‌ها با NumPy
+    semantic_parser = BatchedSemanticSplitter(
+        embed_model=embed_model,
+        breakpoint_percentile_threshold=95,       # هرچی پایین‌تر، چانک‌های ریزتر
+    )
+
+    # --- 3) خواندن docs از out/nodes.jsonl (یکی‌یکی، بدون بارگذاری کل فایل) ---
+    docs = iter_records(artifact_path(OUT_DIR, "nodes"))
+
+    # --- 4) هر صفحه یک بار جمله‌بندی می‌شود (موازی، در چند پروسس) و هر دو خروجی از همان
+    #        جمله‌ها ساخته و به‌صورت جریانی نوشته می‌شوند ---
+    # جمله‌های هر صفحه فقط یک بار در out/sentence_store ذخیره می‌شوند و نودهای sentence window
+    # فقط (ردیف صفحه، شمارهٔ جمله، مرز پنجره) را نگه می‌دارند
+    with ProcessPoolExecutor() as pool, \
+            JsonlWriter(OUT_DIR / "semantic_nodes.jsonl") as semantic_writer, \
+            JsonlWriter(OUT_DIR / "sentence_window_nodes.jsonl") as sentence_writer, \
+            SideTableWriter(SENTENCE_STORE_DIR) as sentence_store:
+        while block := list(islice(docs, DOCS_PER_BATCH)):
+            sentence_lists = list(pool.map(split_page, block, chunksize=4))
+            chunk_lists = semantic_parser.chunk_sentences(sentence_lists)
+
+            for doc, sentences, chunks in zip(block, sentence_lists, chunk_lists):
+                document = Document(text=doc["text"], metadata=doc["metadata"])
+                for i, node in enumerate(semantic_parser.build_nodes(document, chunks)):
+                    semantic_writer.write({
+                        "text": node.text,
+                        "metadata": node.metadata,
+                        "node_id": stable_node_id(document.metadata, "s", i),
+                        "start_char_idx": node.start_char_idx,
+                        "end_char_idx": node.end_char_idx,
+                        "parser_type": "semantic",
+                    })
+
+                # --- 5) نودهای sentence window (فشرده) ---
+                page_row = sentence_store.write({
+                    "page_id": stable_page_id(document.metadata),
+                    "metadata": document.metadata,
+                    "sentences": sentences,
+                })
+                windows = compact_window_records(page_row, document.text, sentences, WINDOW_SIZE)
+                for i, record in enumerate(windows):
+                    sentence_writer.write({"node_id": stable_node_id(document.metadata, "w", i), **record})
+
+    print(
+        f"✅ semantic_nodes.jsonl ({semantic_writer.count}) and "
+        f"sentence_window_nodes.jsonl ({sentence_writer.count}) created successfully."
+    )
+
+
+# پروسس‌های کارگر این ماژول را import می‌کنند؛ خط لوله فقط در پروسس اصلی اجرا شود
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Metadata Prefilters
+
+Inverted index over the chapter/lecture/page metadata of indexed nodes, so
+retrieval can narrow the candidate rows to one chapter, lecture or page
+range before any similarity scoring.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from llama_index.core.vector_stores import (
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+)
+
+# Node metadata keys indexed, as written by make_nodes.py
+INDEXED_FIELDS = ("chapter_id", "lecture_id", "page")
+
+# Stored for nodes without a value for a field
+MISSING = -1
+
+_FILTER_TOKEN = re.compile(r"^(ch|lec|p):(\d+)(?:-(\d+))?\s+")
+
+
+@dataclass
+class RetrievalFilters:
+    """Optional restrictions on which nodes a query may retrieve"""
+    chapter_id: Optional[int] = None
+    lecture_id: Optional[int] = None  # lecture ids restart in every chapter
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+
+    def is_empty(self) -> bool:
+        return (
+            self.chapter_id is None and self.lecture_id is None
+            and self.page_from is None and self.page_to is None
+        )
+
+    def to_llama_filters(self) -> Optional[MetadataFilters]:
+        """Equivalent LlamaIndex MetadataFilters, for the default vector backend"""
+        filters: List[MetadataFilter] = []
+        if self.chapter_id is not None:
+            filters.append(MetadataFilter(key="chapter_id", value=self.chapter_id))
+        if self.lecture_id is not None:
+            filters.append(MetadataFilter(key="lecture_id", value=self.lecture_id))
+        if self.page_from is not None:
+            filters.append(MetadataFilter(key="page", value=self.page_from, operator=FilterOperator.GTE))
+        if self.page_to is not None:
+            filters.append(MetadataFilter(key="page", value=self.page_to, operator=FilterOperator.LTE))
+        return MetadataFilters(filters=filters) if filters else None
+
+
+def parse_filters(question: str) -> Tuple[RetrievalFilters, str]:
+    """
+    Strip leading filter tokens from a REPL question
+
+    Supported tokens: `ch:2`, `lec:1`, `p:18` and `p:18-24`, e.g.
+    "ch:2 lec:1 یاخته‌های پوششی معده چه می‌کنند؟"
+
+    Args:
+        question: Raw input line
+
+    Returns:
+        Tuple of (filters, remaining question text)
+    """
+    filters = RetrievalFilters()
+    text = question.strip() + " "
+    while True:
+        match = _FILTER_TOKEN.match(text)
+        if not match:
+            break
+        key, first, last = match.group(1), int(match.group(2)), match.group(3)
+        if key == "ch":
+            filters.chapter_id = first
+        elif key == "lec":
+            filters.lecture_id = first
+        else:
+            filters.page_from = first
+            filters.page_to = int(last) if last else first
+        text = text[match.end():]
+    return filters, text.strip()
+
+
+def metadata_columns(records: Iterable[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Extract the indexed metadata fields as int32 columns, one entry per row
+
+    Args:
+        records: Node records with a "metadata" dict, in row order
+
+    Returns:
+        Mapping of field name to int32 array (MISSING where absent)
+    """
+    values: Dict[str, List[int]] = {field: [] for field in INDEXED_FIELDS}
+    for record in records:
+        metadata = record.get("metadata") or {}
+        for field in INDEXED_FIELDS:
+            value = metadata.get(field)
+            values[field].append(MISSING if value is None else int(value))
+    return {field: np.asarray(col, dtype=np.int32) for field, col in values.items()}
+
+
+class MetadataIndex:
+    """Sorted postings per field: rows ordered by value, looked up by searchsorted"""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        """
+        Build the postings
+
+        Args:
+            columns: Output of metadata_columns (or loaded from metadata.npz)
+        """
+        self._rows: Dict[str, np.ndarray] = {}
+        self._keys: Dict[str, np.ndarray] = {}
+        for field, column in columns.items():
+            order = np.argsort(column, kind="stable").astype(np.int32)
+            self._rows[field] = order
+            self._keys[field] = column[order]
+
+    def rows_in_range(self, field: str, low: int, high: int) -> np.ndarray:
+        """Rows whose field value is in [low, high], in ascending row order"""
+        keys = self._keys[field]
+        start = np.searchsorted(keys, low, side="left")
+        end = np.searchsorted(keys, high, side="right")
+        return np.sort(self._rows[field][start:end])
+
+    def candidate_rows(self, filters: RetrievalFilters) -> Optional[np.ndarray]:
+        """
+        Rows matching all filters
+
+        Args:
+            filters: Requested restrictions
+
+        Returns:
+            Sorted row indices, or None when no filter is set (all rows)
+        """
+        if filters.is_empty():
+            return None
+
+        selections: List[np.ndarray] = []
+        if filters.chapter_id is not None:
+            selections.append(self.rows_in_range("chapter_id", filters.chapter_id, filters.chapter_id))
+        if filters.lecture_id is not None:
+            selections.append(self.rows_in_range("lecture_id", filters.lecture_id, filters.lecture_id))
+        if filters.page_from is not None or filters.page_to is not None:
+            low = filters.page_from if filters.page_from is not None else 0
+            high = filters.page_to if filters.page_to is not None else np.iinfo(np.int32).max
+            selections.append(self.rows_in_range("page", low, high))
+
+        rows = selections[0]
+        for other in selections[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
@@ -0,0 +1,174 @@
+"""
+Memory-Mapped NumPy Vector Store
+
+Keeps node embeddings as one L2-normalized float32 (or float16) `.npy`
+matrix opened with mmap, plus a JSON Lines side table of node text and
+metadata read on demand. Top-k is one batched matrix-vector product and an
+argpartition, so startup and query latency stay low as the corpus grows.
+
+Layout of a store directory (plus the side_table files):
+    vectors.npy    (n_nodes, dim) normalized embeddings
+"""
+
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from llama_index.core import VectorStoreIndex
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from metadata_filter import RetrievalFilters
+from side_table import SideTable, node_record, write_side_table
+
+PathLike = Union[str, Path]
+
+# Rows scored per block, bounds the temporary float32 copy for float16 stores
+_BLOCK_ROWS = 65536
+
+
+def export_numpy_store(
+    index: VectorStoreIndex,
+    out_dir: PathLike,
+    dtype: str = "float32",
+    dim: Optional[int] = None
+) -> int:
+    """
+    Write the embeddings and nodes of a VectorStoreIndex as a NumPy store
+
+    Args:
+        index: Index built with the default SimpleVectorStore
+        out_dir: Store directory to (re)write
+        dtype: "float32" or "float16" for the vector matrix
+        dim: Embedding dimension of an empty index (defaults to that of the
+            store being replaced, if any)
+
+    Returns:
+        Number of nodes exported
+    """
+    out_dir = Path(out_dir)
+    node_ids = list(index.index_struct.nodes_dict.values())
+    if not node_ids and dim is None:
+        previous = out_dir / "vectors.npy"
+        dim = np.load(previous, mmap_mode="r").shape[1] if previous.exists() else 0
+    write_side_table(out_dir, (node_record(index.docstore.get_node(i)) for i in node_ids))
+
+    if not node_ids:
+        # An empty (or fully deleted) index is an empty store, not an error
+        np.save(out_dir / "vectors.npy", np.zeros((0, dim), dtype=dtype))
+        return 0
+
+    matrix = np.asarray(
+        [index.vector_store.get(node_id) for node_id in node_ids], dtype=np.float32
+    ).reshape(len(node_ids), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1.0, norms)
+
+    np.save(out_dir / "vectors.npy", matrix.astype(dtype))
+    return len(node_ids)
+
+
+class NumpyVectorStore(SideTable):
+    """Read-only, memory-mapped view of a store directory"""
+
+    def __init__(self, store_dir: PathLike):
+        """
+        Open a store (vectors are paged in lazily by the OS)
+
+        Args:
+            store_dir: Directory written by export_numpy_store
+        """
+        super().__init__(store_dir)
+        self.vectors = np.load(Path(store_dir) / "vectors.npy", mmap_mode="r")
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity of the query against all (or the given) rows
+
+        Args:
+            query: Query embedding
+            rows: Optional row indices to restrict scoring to
+
+        Returns:
+            float32 scores, aligned with rows (or with all rows)
+        """
+        matrix = self.vectors if rows is None else self.vectors[rows]
+        if matrix.shape[0] == 0:
+            return np.empty(0, dtype=np.float32)
+        q = np.asarray(query, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)  # not in place: query may be the caller's array
+        if matrix.dtype == np.float32:
+            return matrix @ q
+        out = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], _BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + _BLOCK_ROWS], dtype=np.float32)
+            out[start:start + _BLOCK_ROWS] = block @ q
+        return out
+
+    def query(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the top-k most similar rows
+
+        Args:
+            query: Query embedding
+            top_k: Number of results
+            rows: Optional row indices to restrict the search to
+
+        Returns:
+            List of (row, score), best first
+        """
+        scores = self.scores(query, rows)
+        if scores.size == 0:
+            return []
+        k = min(top_k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        candidates = np.arange(scores.size) if rows is None else np.asarray(rows)
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+class NumpyRetriever(BaseRetriever):
+    """LlamaIndex retriever over a NumpyVectorStore"""
+
+    def __init__(
+        self,
+        store: NumpyVectorStore,
+        embed_model: BaseEmbedding,
+        similarity_top_k: int = 5,
+        filters: Optional[RetrievalFilters] = None,
+        **kwargs: Any
+    ):
+        """
+        Args:
+            store: Opened NumpyVectorStore
+            embed_model: Model used to embed queries (same as at index time)
+            similarity_top_k: Number of nodes to retrieve
+            filters: Optional chapter/lecture/page restrictions applied
+                before scoring
+        """
+        super().__init__(**kwargs)
+        self.store = store
+        self.embed_model = embed_model
+        self.similarity_top_k = similarity_top_k
+        self.filters = filters
+
+    def _query_embedding(self, query_bundle: QueryBundle) -> Sequence[float]:
+        if query_bundle.embedding is None:
+            query_bundle.embedding = self.embed_model.get_agg_embedding_from_queries(
+                query_bundle.embedding_strs
+            )
+        return query_bundle.embedding
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        rows = None
+        if self.filters is not None:
+            rows = self.store.metadata_index.candidate_rows(self.filters)
+        hits = self.store.query(
+            self._query_embedding(query_bundle), self.similarity_top_k, rows
+        )
+        return [NodeWithScore(node=self.store.to_node(row), score=score) for row, score in hits]
@@ -0,0 +1,148 @@
+"""
+OCR Triage
+
+Most textbook pages already have a usable text layer; only scanned or
+badly encoded pages need OCR. Each page's text layer (as extracted by
+local_pdf_parser) is scored on:
+
+    chars           non-whitespace characters
+    persian_ratio   share of letters that are Arabic-script
+    garbage_ratio   share of characters that are replacement characters,
+                    control characters, private-use glyphs or unmapped
+                    presentation forms
+    run_on_ratio    share of characters in "words" longer than
+                    RUN_ON_WORD_LENGTH, i.e. words glued together by an
+                    extractor that lost the word separators (pypdfium2 does
+                    this on PDFs that place each word separately)
+
+and only pages below the ParserSettings.triage_* thresholds are sent to
+the OCR/LLM parser. The rest keep their local text.
+"""
+
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple
+
+from config import ParserSettings
+
+# Unicode categories that never appear in a cleanly extracted page
+# (whitespace controls such as \n are skipped before this check)
+_GARBAGE_CATEGORIES = {"Cc", "Co", "Cs", "Cn"}
+
+# Longer than any real Persian word, even with its ZWNJ half-spaces dropped
+RUN_ON_WORD_LENGTH = 20
+
+
+def _is_arabic_script(char: str) -> bool:
+    code = ord(char)
+    return 0x0600 <= code <= 0x06FF or 0x0750 <= code <= 0x077F or 0x08A0 <= code <= 0x08FF
+
+
+def _is_garbage(char: str) -> bool:
+    if char == "\ufffd":
+        return True
+    code = ord(char)
+    # Arabic presentation forms: glyphs from fonts without a ToUnicode map
+    if 0xFB50 <= code <= 0xFDFF or 0xFE70 <= code <= 0xFEFF:
+        return True
+    return unicodedata.category(char) in _GARBAGE_CATEGORIES
+
+
+@dataclass
+class PageQuality:
+    """Text-layer quality of one page"""
+    page: int
+    chars: int
+    persian_ratio: float
+    garbage_ratio: float
+    run_on_ratio: float
+    needs_ocr: bool
+
+
+def score_text_layer(text: str) -> Tuple[int, float, float, float]:
+    """
+    Score an extracted text layer
+
+    Args:
+        text: Page text
+
+    Returns:
+        (chars, persian_ratio, garbage_ratio, run_on_ratio)
+    """
+    chars = letters = persian = garbage = 0
+    for char in text:
+        if char.isspace():
+            continue
+        chars += 1
+        if _is_garbage(char):
+            garbage += 1
+        elif char.isalpha():
+            letters += 1
+            if _is_arabic_script(char):
+                persian += 1
+    run_on = sum(len(word) for word in text.split() if len(word) > RUN_ON_WORD_LENGTH)
+    return (
+        chars,
+        persian / letters if letters else 0.0,
+        garbage / chars if chars else 0.0,
+        run_on / chars if chars else 0.0,
+    )
+
+
+def assess_page(page: int, text: str, settings: ParserSettings) -> PageQuality:
+    """
+    Decide whether a page needs OCR
+
+    Args:
+        page: Page number
+        text: Page text from the local extractor
+        settings: Parser settings with the triage_* thresholds
+
+    Returns:
+        PageQuality; needs_ocr is set when the page has too little text,
+        too few Persian letters, too much garbage or too many run-on words
+    """
+    chars, persian_ratio, garbage_ratio, run_on_ratio = score_text_layer(text)
+    needs_ocr = (
+        chars < settings.triage_min_chars
+        or persian_ratio < settings.triage_min_persian_ratio
+        or garbage_ratio > settings.triage_max_garbage_ratio
+        or run_on_ratio > settings.triage_max_run_on_ratio
+    )
+    return PageQuality(page, chars, persian_ratio, garbage_ratio, run_on_ratio, needs_ocr)
+
+
+def triage_pages(texts: Iterable[str], settings: ParserSettings) -> List[PageQuality]:
+    """
+    Assess every page of a book
+
+    Args:
+        texts: Page texts, page 1 first
+        settings: Parser settings with the triage_* thresholds
+
+    Returns:
+        One PageQuality per page
+    """
+    return [assess_page(page, text, settings) for page, text in enumerate(texts, 1)]
+
+
+def page_runs(qualities: Iterable[PageQuality], max_pages: int = 0) -> List[Tuple[int, int, bool]]:
+    """
+    Group consecutive pages with the same OCR verdict
+
+    Args:
+        qualities: PageQuality of each page, in page order
+        max_pages: Maximum pages per run (0: unlimited)
+
+    Returns:
+        (first_page, last_page, needs_ocr) runs, in page order
+    """
+    runs: List[Tuple[int, int, bool]] = []
+    for q in qualities:
+        if runs:
+            first, last, needs_ocr = runs[-1]
+            if needs_ocr == q.needs_ocr and last == q.page - 1 and not (max_pages and q.page - first >= max_pages):
+                runs[-1] = (first, q.page, needs_ocr)
+                continue
+        runs.append((q.page, q.page, q.needs_ocr))
+    return runs
@@ -1,8 +1,9 @@
+import os
 from llama_cloud_services import LlamaParse
 
 parser = LlamaParse(
   # See how to get your API key at https://developers.llamaindex.ai/python/cloud/general/api_key/
-  api_key="llx-XBtyThevmRXlr43daJL7KZkax3NRFKvLl8BC5LXTTaHIaSln",
+  api_key=os.getenv("LLAMA_CLOUD_API_KEY"),
 
   # The maximum number of pages to parse
   max_pages=25,
@@ -1,7 +1,8 @@
+import os
 from llama_cloud_services import LlamaParse
 import json
 parser = LlamaParse(
-  api_key="llx-XBtyThevmRXlr43daJL7KZkax3NRFKvLl8BC5LXTTaHIaSln",
+  api_key=os.getenv("LLAMA_CLOUD_API_KEY"),
 
   # The maximum number of pages to parse
   max_pages=25,
@@ -40,7 +41,7 @@ parser = LlamaParse(
 
 parserImages = LlamaParse(
   # See how to get your API key at https://developers.llamaindex.ai/python/cloud/general/api_key/
-  api_key="llx-XBtyThevmRXlr43daJL7KZkax3NRFKvLl8BC5LXTTaHIaSln",
+  api_key=os.getenv("LLAMA_CLOUD_API_KEY"),
 
   # The maximum number of pages to parse
   max_pages=25,
@@ -6,51 +6,35 @@
 
 from pathlib import Path
 import json
+import sys
 
-from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions, TesseractCliOcrOptions
-from docling.datamodel.accelerator_options import AcceleratorOptions, AcceleratorDevice
-from docling.document_converter import DocumentConverter, PdfFormatOption
-from rtl_fix import fix_rtl_text
+# تبدیل docling حالا در scripts/docling_parser.py است (بازه‌های صفحه در چند پروسس، فقط CPU)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from config import ParserSettings
+from docling_parser import DoclingPDFParser
 
 pdf_path = Path("input.pdf")
 out_dir = Path("out")
 out_dir.mkdir(exist_ok=True)
 
-# 1) OCR دستی با tesseract (فارسی)
-ocr_opts = TesseractCliOcrOptions()
-ocr_opts.lang = ["fas"]   # اگر زبان‌پک auto داری می‌تونی ["auto"] بزاری
 
-pipeline_opts = PdfPipelineOptions()
-pipeline_opts.do_ocr = True
-pipeline_opts.ocr_options = ocr_opts
+def main():
+    # فقط صفحه‌هایی که لایهٔ متنی خوبی ندارند OCR می‌شوند (آستانه‌های پیش‌فرض ParserSettings)
+    settings = ParserSettings(api_key="", backend="docling", ocr_triage=True)
+    json_result, documents = DoclingPDFParser(settings).parse_pdf(str(pdf_path))
 
-# 2) سنگینی layout/table رو کم کن (اختیاری ولی برای رفع هنگ مفید)
-pipeline_opts.do_table_structure = False
+    md_fixed = "\n\n".join(page["md"] for page in json_result["pages"].values())
 
-# 3) اجباراً CPU تا وارد MPS/ocrmac نشه
-pipeline_opts.accelerator_options = AcceleratorOptions(
-    device=AcceleratorDevice.CPU, num_threads=4
-)
+    (out_dir / "doc.md").write_text(md_fixed, encoding="utf-8")
+    # یک سند docling برای هر بازهٔ صفحه، به ترتیب صفحه
+    (out_dir / "doc.json").write_text(
+        json.dumps(documents, ensure_ascii=False, indent=2),
+        encoding="utf-8"
+    )
 
-converter = DocumentConverter(
-    format_options={
-        InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_opts)
-    }
-)
+    print("PDF parsed successfully -> out/doc.md , out/doc.json")
 
-result = converter.convert(pdf_path)
-doc = result.document
 
-md = doc.export_to_markdown()
-md_fixed = fix_rtl_text(md)
-
-(out_dir / "doc.md").write_text(md_fixed, encoding="utf-8")
-(out_dir / "doc.json").write_text(
-    json.dumps(doc.export_to_dict(), ensure_ascii=False, indent=2),
-    encoding="utf-8"
-)
-
-print("PDF parsed successfully -> out/doc.md , out/doc.json")
-
-# llx-XBtyThevmRXlr43daJL7KZkax3NRFKvLl8BC5LXTTaHIaSln
\ No newline at end of file
+# docling_parser پروسس‌های کارگر می‌سازد؛ تبدیل فقط در پروسس اصلی اجرا شود
+if __name__ == "__main__":
+    main()
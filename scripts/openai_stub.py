@@ -0,0 +1,164 @@
+"""
+Local OpenAI API Stub
+
+Minimal stand-in for the OpenAI `/v1/embeddings` and `/v1/chat/completions`
+endpoints, so query_service.py can be run and load-tested offline. Point
+the scripts at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1
+
+Embeddings are the deterministic HashEmbedding vectors (use --dim to match
+the dimension of the index being queried); chat completions return a canned
+answer after an optional simulated latency. GET /stats reports how many
+requests and inputs each endpoint has served.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List
+
+import numpy as np
+from aiohttp import web
+
+from embedding_cache import HashEmbedding
+
+STATS_KEY = web.AppKey("stats", Counter)
+EMBED_MODEL_KEY = web.AppKey("embed_model", HashEmbedding)
+LATENCY_KEY = web.AppKey("latency", float)
+
+
+def _encode_embedding(vector: List[float], encoding_format: str) -> Any:
+    # The openai client asks for base64 (packed float32) by default
+    if encoding_format == "base64":
+        return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+    return vector
+
+
+def _stub_answer(messages: List[Dict[str, Any]]) -> str:
+    question = ""
+    for message in messages:
+        if message.get("role") == "user":
+            content = message.get("content")
+            question = content if isinstance(content, str) else json.dumps(content)
+    return f"(stub answer) {len(question)} prompt characters received."
+
+
+async def embeddings(request: web.Request) -> web.Response:
+    body = await request.json()
+    inputs = body.get("input", [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+
+    stats = request.app[STATS_KEY]
+    stats["embedding_requests"] += 1
+    stats["embedding_inputs"] += len(inputs)
+
+    embed_model = request.app[EMBED_MODEL_KEY]
+    encoding_format = body.get("encoding_format", "float")
+    data = [
+        {
+            "object": "embedding",
+            "index": i,
+            "embedding": _encode_embedding(embed_model.get_text_embedding(text), encoding_format),
+        }
+        for i, text in enumerate(inputs)
+    ]
+    tokens = sum(len(str(text).split()) for text in inputs)
+    return web.json_response({
+        "object": "list",
+        "data": data,
+        "model": body.get("model", embed_model.model_name),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    })
+
+
+async def chat_completions(request: web.Request) -> web.StreamResponse:
+    body = await request.json()
+    stats = request.app[STATS_KEY]
+    stats["chat_requests"] += 1
+
+    await asyncio.sleep(request.app[LATENCY_KEY])
+    answer = _stub_answer(body.get("messages", []))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    model = body.get("model", "stub")
+
+    if not body.get("stream"):
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+
+    async def send(delta: Dict[str, Any], finish_reason=None) -> None:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    await send({"role": "assistant", "content": ""})
+    for word in answer.split(" "):
+        await send({"content": word + " "})
+    await send({}, finish_reason="stop")
+    await response.write(b"data: [DONE]\n\n")
+    await response.write_eof()
+    return response
+
+
+async def stats(request: web.Request) -> web.Response:
+    return web.json_response(dict(request.app[STATS_KEY]))
+
+
+def create_app(dim: int = 1536, latency_ms: float = 0.0) -> web.Application:
+    """
+    Build the stub application
+
+    Args:
+        dim: Embedding dimension (1536 matches text-embedding-3-small)
+        latency_ms: Simulated chat completion latency
+
+    Returns:
+        aiohttp Application
+    """
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app[STATS_KEY] = Counter()
+    app[EMBED_MODEL_KEY] = HashEmbedding(dim=dim)
+    app[LATENCY_KEY] = latency_ms / 1000.0
+    app.router.add_post("/v1/embeddings", embeddings)
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the OpenAI embeddings/chat endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated chat latency")
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.dim, args.latency_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Content-Addressed Parse Cache
+
+Stores parsed page records on disk keyed by a content hash of each PDF page
+and a fingerprint of the parse-relevant ParserSettings, so re-ingesting an
+unchanged (or partly edited) book only sends new or edited pages to LlamaParse.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+from config import ParserSettings
+
+# Settings that don't change the parsed output of a page (the cache is only
+# used by the LlamaParse backend)
+_NON_PARSE_SETTINGS = {
+    "api_key", "base_url", "max_pages", "max_concurrent_jobs", "use_parse_cache", "backend", "local_workers",
+    "ocr_triage", "triage_extractor", "triage_min_chars", "triage_min_persian_ratio",
+    "triage_max_garbage_ratio", "triage_max_run_on_ratio", "docling_workers", "docling_pages_per_range",
+    "docling_worker_memory_mb", "docling_ocr_lang", "image_download_concurrency",
+}
+
+# Keys that depend on where a page sits in the book, not on its content
+POSITIONAL_KEYS = ("page", "chapter", "lecture")
+
+
+def settings_fingerprint(settings: ParserSettings) -> str:
+    """
+    Hash the parse-relevant settings (parse modes, model, OCR, prompt, ...)
+
+    Args:
+        settings: Parser settings
+
+    Returns:
+        Hex digest that changes whenever a setting affecting output changes
+    """
+    relevant = {
+        key: value for key, value in asdict(settings).items()
+        if key not in _NON_PARSE_SETTINGS
+    }
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Entries that don't affect what is drawn (or would pull in the page tree)
+_SKIP_KEYS = {"/Length", "/Parent"}
+
+
+def _hash_object(digest, obj: Any, memo: Dict[Tuple[int, int], str]) -> None:
+    """
+    Feed a PDF object tree into a hash: dictionaries by sorted key, stream
+    data, and indirect objects by the digest of what they resolve to
+
+    memo maps indirect references to their digests, so objects shared by
+    many pages (fonts, ToUnicode maps, images) are hashed once per file,
+    and reference cycles end at the reference.
+    """
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+        if key not in memo:
+            memo[key] = ""  # cycle guard
+            sub = hashlib.sha256()
+            _hash_object(sub, obj.get_object(), memo)
+            memo[key] = sub.hexdigest()
+        digest.update(b"R" + memo[key].encode("ascii"))
+        return
+
+    if isinstance(obj, StreamObject):
+        digest.update(b"S")
+        digest.update(obj.get_data())
+    if isinstance(obj, DictionaryObject):
+        digest.update(b"<<")
+        for name in sorted(obj):
+            if name in _SKIP_KEYS:
+                continue
+            digest.update(name.encode("utf-8"))
+            _hash_object(digest, obj.raw_get(name), memo)
+        digest.update(b">>")
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"[")
+        for item in obj:
+            _hash_object(digest, item, memo)
+        digest.update(b"]")
+    elif not isinstance(obj, StreamObject):
+        digest.update(repr(obj).encode("utf-8"))
+
+
+def _page_digest(page, memo: Dict[Tuple[int, int], str]) -> str:
+    """
+    Hash a PDF page's content stream, geometry and its whole resource tree
+    (fonts with their ToUnicode maps and font files, images, nested form
+    XObjects and their own resources, ...)
+    """
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+
+    for key in ("/Resources", "/MediaBox", "/CropBox", "/Rotate"):
+        if key in page:
+            digest.update(key.encode("utf-8"))
+            _hash_object(digest, page.raw_get(key), memo)
+    return digest.hexdigest()
+
+
+def compute_page_hashes(pdf_path: str) -> List[str]:
+    """
+    Compute a content hash for every page of a PDF
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        List of hex digests, index 0 being page 1
+    """
+    memo: Dict[Tuple[int, int], str] = {}
+    return [_page_digest(page, memo) for page in PdfReader(pdf_path).pages]
+
+
+class ParseCache:
+    """On-disk cache of parsed page records for one settings fingerprint"""
+
+    def __init__(self, cache_dir: str, settings: ParserSettings):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Root directory of the cache
+            settings: Parser settings (their fingerprint namespaces the entries)
+        """
+        self.root = os.path.join(cache_dir, settings_fingerprint(settings)[:16])
+
+    def _path(self, page_hash: str) -> str:
+        return os.path.join(self.root, page_hash[:2], f"{page_hash}.json")
+
+    def get(self, page_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached page record
+
+        Args:
+            page_hash: Content hash of the page
+
+        Returns:
+            The cached record (without positional keys), or None on a miss
+        """
+        path = self._path(page_hash)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, page_hash: str, record: Dict[str, Any]) -> None:
+        """
+        Store a page record, dropping page number and chapter/lecture info
+
+        Args:
+            page_hash: Content hash of the page
+            record: Page record as built by PDFParser.build_json_result
+        """
+        path = self._path(page_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        content = {k: v for k, v in record.items() if k not in POSITIONAL_KEYS}
+
+        # Write-then-rename so an interrupted run never leaves a truncated entry
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -7,16 +7,110 @@ error handling, and configuration management.
 Usage:
     export LLAMA_CLOUD_API_KEY='your-api-key'
     python pdf_parser.py
+
+    # Offline, from the PDF's text layer (see local_pdf_parser.py)
+    PARSER_BACKEND=pypdf2 python pdf_parser.py
+
+    # Offline with docling layout analysis and OCR (see docling_parser.py)
+    PARSER_BACKEND=docling python pdf_parser.py
 """
 
+import asyncio
 import json
 import os
-from typing import Dict, List, Any, Tuple
+import tempfile
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Any, Optional, Tuple
 
 from llama_cloud_services import LlamaParse
+from llama_index.core.async_utils import asyncio_run
 
 from config import ParserSettings, PathSettings, load_settings_from_env, get_default_paths
 from biology_textbook import get_chapter_and_lecture_by_page
+from image_store import ImageDownloader, ImageStore
+from jsonl_io import JsonlWriter, write_jsonl
+from local_pdf_parser import LocalPDFParser
+from ocr_triage import triage_pages
+from parse_cache import POSITIONAL_KEYS, ParseCache, compute_page_hashes, settings_fingerprint
+from pdf_shards import (
+    PageShard,
+    count_pdf_pages,
+    get_chapter_ranges,
+    load_shard_result,
+    plan_shards,
+    save_shard_result,
+    shards_for_pages,
+    source_shard_dir,
+    write_shard_pdf,
+)
+
+
+def _with_position(page: int, record: Dict[str, Any]) -> Dict[str, Any]:
+    """A page record with its page number and chapter/lecture info (re)attached"""
+    chapter_lecture_info = get_chapter_and_lecture_by_page(page)
+    return {
+        "page": page,
+        **{k: v for k, v in record.items() if k not in POSITIONAL_KEYS},
+        "chapter": chapter_lecture_info["chapter"] if chapter_lecture_info else None,
+        "lecture": chapter_lecture_info["lecture"] if chapter_lecture_info else None,
+    }
+
+
+async def _collect_pages(records: AsyncIterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """Gather streamed page records into a {"pages": {...}} dict in page order"""
+    pages = {}
+    async for record in records:
+        pages[record["page"]] = record
+    return {"pages": {str(page): pages[page] for page in sorted(pages)}}
+
+
+class PageOutputWriter:
+    """
+    Writes page records to the JSONL and markdown outputs in page order
+
+    Records may arrive in any order (e.g. as shards finish); each is written
+    as soon as every page before it has been, so only pages that arrive
+    ahead of a slower shard are held in memory.
+    """
+
+    def __init__(self, jsonl_path: str, markdown_path: str, pages: Iterable[int]):
+        """
+        Args:
+            jsonl_path: Path to save the JSONL file
+            markdown_path: Path to save the markdown file
+            pages: Page numbers that will be written
+        """
+        self._order = sorted(pages)
+        self._next = 0
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._jsonl = JsonlWriter(jsonl_path)
+        markdown_dir = os.path.dirname(markdown_path)
+        if markdown_dir:
+            os.makedirs(markdown_dir, exist_ok=True)
+        self._markdown = open(markdown_path, "w", encoding="utf-8")
+
+    @property
+    def count(self) -> int:
+        return self._jsonl.count
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Accept one page record, writing every page that is now next in order"""
+        self._pending[record["page"]] = record
+        while self._next < len(self._order) and self._order[self._next] in self._pending:
+            page = self._pending.pop(self._order[self._next])
+            self._jsonl.write(page)
+            self._markdown.write(page.get("md") or "")
+            self._markdown.write("\n\n")
+            self._next += 1
+
+    def close(self) -> None:
+        self._jsonl.close()
+        self._markdown.close()
+
+    def __enter__(self) -> "PageOutputWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
 
 class PDFParser:
@@ -32,6 +126,10 @@ class PDFParser:
         self.settings = settings
         self._text_parser = None
         self._image_parser = None
+        # Shared by every shard, so downloads stay within
+        # image_download_concurrency and duplicates are stored once
+        self._image_downloader: Optional[ImageDownloader] = None
+        self._image_stores: Dict[str, ImageStore] = {}
     
     def _create_text_parser(self) -> LlamaParse:
         """Create text parser instance with configuration"""
@@ -97,6 +195,66 @@ class PDFParser:
         print("  ✓ PDF parsed successfully")
         return text_result, image_result
     
+    async def aparse_pdf(self, pdf_path: str) -> Tuple[Any, Any]:
+        """
+        Parse PDF file asynchronously, running text and image jobs together
+        
+        Both LlamaParse jobs are submitted at once and awaited jointly, so the
+        wall-clock time is that of the slower job instead of the sum of both.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Tuple of (text_result, image_result)
+            
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        print(f"📄 Parsing PDF: {pdf_path}")
+        
+        # Create parsers
+        text_parser = self._create_text_parser()
+        image_parser = self._create_image_parser()
+        
+        # Parse PDF (text and images concurrently)
+        print("  ⏳ Extracting text content and images...")
+        text_result, image_result = await asyncio.gather(
+            text_parser.aparse(pdf_path),
+            image_parser.aparse(pdf_path),
+        )
+        
+        print(f"  ✓ PDF parsed successfully: {pdf_path}")
+        return text_result, image_result
+    
+    async def aparse_pdfs(
+        self,
+        pdf_paths: List[str],
+        max_concurrency: Optional[int] = None
+    ) -> List[Tuple[Any, Any]]:
+        """
+        Parse many PDF files asynchronously with bounded concurrency
+        
+        Args:
+            pdf_paths: Paths to the PDF files
+            max_concurrency: Maximum number of PDFs in flight at once
+                (defaults to settings.max_concurrent_jobs)
+            
+        Returns:
+            List of (text_result, image_result) tuples, in the order of pdf_paths
+        """
+        limit = max_concurrency or self.settings.max_concurrent_jobs
+        semaphore = asyncio.Semaphore(max(1, limit))
+        
+        async def _parse_one(pdf_path: str) -> Tuple[Any, Any]:
+            async with semaphore:
+                return await self.aparse_pdf(pdf_path)
+        
+        return await asyncio.gather(*(_parse_one(path) for path in pdf_paths))
+    
     def extract_markdown(self, text_result, output_path: str) -> None:
         """
         Extract and save markdown documents
@@ -120,6 +278,72 @@ class PDFParser:
         
         print(f"  ✓ Saved: {output_path}")
     
+    def _create_image_downloader(self) -> ImageDownloader:
+        """Create an image downloader with configuration"""
+        return ImageDownloader(
+            self.settings.api_key,
+            base_url=self.settings.base_url,
+            max_concurrency=self.settings.image_download_concurrency,
+        )
+    
+    def _image_store(self, image_dir: str) -> ImageStore:
+        """The parser's ImageStore for a directory"""
+        if image_dir not in self._image_stores:
+            os.makedirs(image_dir, exist_ok=True)
+            self._image_stores[image_dir] = ImageStore(image_dir)
+        return self._image_stores[image_dir]
+    
+    async def _adownload_images(
+        self,
+        downloader: ImageDownloader,
+        image_result,
+        image_dir: str,
+        include_screenshots: bool,
+        include_objects: bool
+    ) -> List[Any]:
+        print(f"🖼️  Extracting images...")
+        image_documents, stats = await downloader.adownload(
+            image_result,
+            self._image_store(image_dir),
+            include_screenshots=include_screenshots,
+            include_objects=include_objects,
+        )
+        print(
+            f"  ✓ Extracted {len(image_documents)} images to: {image_dir} "
+            f"({stats.stored} new, {stats.duplicates} already stored)"
+        )
+        return image_documents
+    
+    async def aextract_images(
+        self,
+        image_result,
+        image_dir: str,
+        include_screenshots: bool = True,
+        include_objects: bool = True
+    ) -> List[Any]:
+        """
+        Extract and save images from PDF asynchronously
+        
+        Images are downloaded concurrently over the parser's shared session
+        and stored once per distinct content (see image_store.py), so
+        concurrent shards share one connection pool and one image_dir.
+        Call aclose() when done.
+        
+        Args:
+            image_result: Result from image parser
+            image_dir: Directory to save images
+            include_screenshots: Include screenshot images
+            include_objects: Include object images
+            
+        Returns:
+            List of image documents
+        """
+        if self._image_downloader is None:
+            self._image_downloader = self._create_image_downloader()
+        return await self._adownload_images(
+            self._image_downloader, image_result, image_dir, include_screenshots, include_objects
+        )
+    
     def extract_images(
         self, 
         image_result, 
@@ -130,6 +354,9 @@ class PDFParser:
         """
         Extract and save images from PDF
         
+        Synchronous version of aextract_images(), with its own session;
+        safe to call whether or not an event loop is running.
+        
         Args:
             image_result: Result from image parser
             image_dir: Directory to save images
@@ -139,73 +366,532 @@ class PDFParser:
         Returns:
             List of image documents
         """
-        print(f"🖼️  Extracting images...")
-        os.makedirs(image_dir, exist_ok=True)
-        
-        image_documents = image_result.get_image_documents(
-            include_screenshot_images=include_screenshots,
-            include_object_images=include_objects,
-            image_download_dir=image_dir,
-        )
+        async def _download() -> List[Any]:
+            async with self._create_image_downloader() as downloader:
+                return await self._adownload_images(
+                    downloader, image_result, image_dir, include_screenshots, include_objects
+                )
         
-        print(f"  ✓ Extracted {len(image_documents)} images to: {image_dir}")
-        return image_documents
+        return asyncio_run(_download())
+    
+    async def aclose(self) -> None:
+        """Close the shared image download session"""
+        if self._image_downloader is not None:
+            await self._image_downloader.aclose()
+            self._image_downloader = None
     
-    def build_json_result(self, text_result, image_documents: List[Any]) -> Dict[str, Any]:
+    def iter_page_records(
+        self,
+        text_result,
+        image_documents: List[Any],
+        page_offset: int = 0
+    ) -> Iterator[Dict[str, Any]]:
         """
-        Build structured JSON result from parsing results
+        Yield one structured page record at a time from parsing results
         
         Args:
             text_result: Result from text parser
             image_documents: List of extracted image documents
+            page_offset: Added to each parsed page number to get the page
+                number in the full book (non-zero when parsing a shard)
             
-        Returns:
-            Dictionary with structured page data including chapter and lecture info
+        Yields:
+            Page dictionaries including chapter and lecture info
         """
-        print("🔧 Building JSON result...")
-        json_result = {"pages": {}}
+        page_image_index = self.build_page_image_index(image_documents)
         
-        for i, page in enumerate(text_result.pages, 1):
-            page_images = self._extract_page_images(image_documents, i)
+        for local_page, page in enumerate(text_result.pages, 1):
+            page_images = page_image_index.get(local_page, [])
+            i = local_page + page_offset
             
             # Get chapter and lecture information for this page
             chapter_lecture_info = get_chapter_and_lecture_by_page(i)
     
-            page_data = {
+            yield {
                 "page": i,
                 "text": page.text,
                 "md": page.md,
                 "images": page_images,
                 "layout": str(page.layout) if hasattr(page, 'layout') else None,
-                        "structuredData": page.structuredData if hasattr(page, 'structuredData') else None,
-                        "chapter": chapter_lecture_info["chapter"] if chapter_lecture_info else None,
-                        "lecture": chapter_lecture_info["lecture"] if chapter_lecture_info else None
+                "structuredData": page.structuredData if hasattr(page, 'structuredData') else None,
+                "chapter": chapter_lecture_info["chapter"] if chapter_lecture_info else None,
+                "lecture": chapter_lecture_info["lecture"] if chapter_lecture_info else None
             }
-            json_result["pages"][str(i)] = page_data
+    
+    def build_json_result(
+        self,
+        text_result,
+        image_documents: List[Any],
+        page_offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Build structured JSON result from parsing results
+        
+        Args:
+            text_result: Result from text parser
+            image_documents: List of extracted image documents
+            page_offset: Added to each parsed page number to get the page
+                number in the full book (non-zero when parsing a shard)
+            
+        Returns:
+            Dictionary with structured page data including chapter and lecture info
+        """
+        print("🔧 Building JSON result...")
+        json_result = {"pages": {}}
+        
+        for page_data in self.iter_page_records(text_result, image_documents, page_offset):
+            json_result["pages"][str(page_data["page"])] = page_data
 
         print(f"  ✓ Processed {len(text_result.pages)} pages")
         return json_result
     
-    def _extract_page_images(self, image_documents: List[Any], page_number: int) -> List[Dict[str, Any]]:
+    def build_page_image_index(self, image_documents: List[Any]) -> Dict[int, List[Dict[str, Any]]]:
         """
-        Extract images for a specific page
+        Bucket image documents by page number in a single pass
         
         Args:
             image_documents: List of all image documents
-            page_number: Page number to extract images for
             
         Returns:
-            List of image dictionaries for the page
+            Mapping of page number to the list of image dictionaries on that page
         """
-        page_images = []
+        index: Dict[int, List[Dict[str, Any]]] = {}
         for img_doc in image_documents:
-            if hasattr(img_doc, 'metadata') and img_doc.metadata.get('page_number') == page_number:
-                page_images.append({
-                    "image_path": getattr(img_doc, 'image_path', None),
-                    "image_url": getattr(img_doc, 'image_url', None),
-                    "text": getattr(img_doc, 'text', None)
-                })
-        return page_images
+            if not hasattr(img_doc, 'metadata'):
+                continue
+            page_number = img_doc.metadata.get('page_number')
+            if page_number is None:
+                continue
+            index.setdefault(page_number, []).append({
+                "image_path": getattr(img_doc, 'image_path', None),
+                "image_url": getattr(img_doc, 'image_url', None),
+                "text": getattr(img_doc, 'text', None),
+                "image_name": img_doc.metadata.get('image_name'),
+                "sha256": img_doc.metadata.get('sha256'),
+            })
+        return index
+    
+    async def aparse_shard(
+        self,
+        pdf_path: str,
+        shard: PageShard,
+        shard_dir: str,
+        image_dir: str
+    ) -> Dict[str, Any]:
+        """
+        Parse one page window of a PDF and save its JSON result
+        
+        A shard that already has a saved result is not parsed again, so a
+        failed run only needs its failed shards re-run.
+        
+        Args:
+            pdf_path: Path to the full PDF file
+            shard: Page window to parse
+            shard_dir: Directory for shard PDFs and shard results
+            image_dir: Directory to save images
+            
+        Returns:
+            Shard result dictionary keyed by global page number
+        """
+        cached = load_shard_result(shard, shard_dir)
+        if cached is not None:
+            print(f"  ✓ Reusing {shard.name}")
+            return cached
+        
+        shard_path = await asyncio.to_thread(write_shard_pdf, pdf_path, shard, shard_dir)
+        text_result, image_result = await self.aparse_pdf(shard_path)
+        image_documents = await self.aextract_images(image_result, image_dir)
+        
+        def _finish() -> Dict[str, Any]:
+            result = self.build_json_result(
+                text_result, image_documents, page_offset=shard.page_offset
+            )
+            save_shard_result(shard, shard_dir, result)
+            return result
+        
+        return await asyncio.to_thread(_finish)
+    
+    async def _aiter_shards(
+        self,
+        pdf_path: str,
+        shards: List[PageShard],
+        shard_dir: str,
+        image_dir: str,
+        failure_hint: str = ""
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parse shards in parallel, yielding each result as soon as it is done
+        
+        Args:
+            pdf_path: Path to the full PDF file
+            shards: Page windows to parse
+            shard_dir: Directory for shard PDFs and shard results
+            image_dir: Directory to save images
+            failure_hint: Appended to the error message if shards failed
+            
+        Yields:
+            Shard results keyed by global page number, in completion order
+            
+        Raises:
+            RuntimeError: After every other shard has been yielded, if any
+                shard failed
+        """
+        semaphore = asyncio.Semaphore(max(1, self.settings.max_concurrent_jobs))
+        
+        async def _parse_one(shard: PageShard) -> Tuple[PageShard, Any]:
+            async with semaphore:
+                try:
+                    return shard, await self.aparse_shard(pdf_path, shard, shard_dir, image_dir)
+                except Exception as e:
+                    return shard, e
+        
+        tasks = [asyncio.ensure_future(_parse_one(shard)) for shard in shards]
+        errors = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                shard, result = await next_done
+                if isinstance(result, Exception):
+                    errors.append((shard, result))
+                else:
+                    yield result
+        finally:
+            # Only does something if the consumer stopped early
+            for task in tasks:
+                task.cancel()
+        
+        if errors:
+            raise RuntimeError(
+                f"{len(errors)} of {len(shards)} shards failed: "
+                f"{', '.join(shard.name for shard, _ in errors)}.{failure_hint}"
+            ) from errors[0][1]
+    
+    async def aiter_pdf_sharded(
+        self,
+        pdf_path: str,
+        shard_dir: str,
+        image_dir: str,
+        ranges: Optional[List[Tuple[int, int]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parse a PDF as page windows in parallel, yielding page records as
+        each window finishes (see aparse_pdf_sharded)
+        
+        Args:
+            pdf_path: Path to the PDF file
+            shard_dir: Root directory for shard PDFs and shard results (each
+                source PDF and parse settings fingerprint get a subdirectory)
+            image_dir: Directory to save images
+            ranges: Page ranges to align shards to (defaults to the chapter
+                ranges of BIOLOGY_TEXTBOOK)
+                
+        Yields:
+            Page records with global page numbers, in shard completion order
+            
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+            RuntimeError: If any shard failed (successful shards are kept)
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        shard_dir = await asyncio.to_thread(
+            source_shard_dir, shard_dir, pdf_path, settings_fingerprint(self.settings)
+        )
+        total_pages = count_pdf_pages(pdf_path)
+        shards = plan_shards(
+            total_pages,
+            self.settings.max_pages,
+            get_chapter_ranges() if ranges is None else ranges,
+        )
+        print(f"🧩 Parsing {total_pages} pages as {len(shards)} shards")
+        
+        results = self._aiter_shards(
+            pdf_path, shards, shard_dir, image_dir,
+            failure_hint=" Run again to retry only the failed shards.",
+        )
+        async for result in results:
+            for record in result["pages"].values():
+                yield record
+    
+    async def aparse_pdf_sharded(
+        self,
+        pdf_path: str,
+        shard_dir: str,
+        image_dir: str,
+        ranges: Optional[List[Tuple[int, int]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse a PDF as page windows in parallel and stitch the results
+        
+        Args:
+            pdf_path: Path to the PDF file
+            shard_dir: Root directory for shard PDFs and shard results (each
+                source PDF and parse settings fingerprint get a subdirectory)
+            image_dir: Directory to save images
+            ranges: Page ranges to align shards to (defaults to the chapter
+                ranges of BIOLOGY_TEXTBOOK)
+                
+        Returns:
+            Merged {"pages": {...}} dictionary with global page numbers
+            
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+            RuntimeError: If any shard failed (successful shards are kept)
+        """
+        json_result = await _collect_pages(self.aiter_pdf_sharded(pdf_path, shard_dir, image_dir, ranges))
+        print(f"  ✓ Stitched {len(json_result['pages'])} pages")
+        return json_result
+    
+    async def aiter_pages(
+        self,
+        pdf_path: str,
+        pages: List[int],
+        image_dir: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parse selected pages of a PDF with LlamaParse, yielding page records
+        as each shard finishes
+        
+        The pages are grouped into contiguous shards of at most max_pages,
+        parsed in parallel from temporary shard PDFs.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            pages: Page numbers to parse (1-based)
+            image_dir: Directory to save images
+            
+        Yields:
+            Page records with global page numbers, in shard completion order
+            
+        Raises:
+            RuntimeError: If any shard failed (after the other shards'
+                records have been yielded)
+        """
+        shards = shards_for_pages(pages, self.settings.max_pages)
+        with tempfile.TemporaryDirectory() as shard_dir:
+            async for result in self._aiter_shards(pdf_path, shards, shard_dir, image_dir):
+                for record in result["pages"].values():
+                    yield record
+    
+    async def aparse_pages(
+        self,
+        pdf_path: str,
+        pages: List[int],
+        image_dir: str
+    ) -> Dict[str, Any]:
+        """
+        Parse selected pages of a PDF with LlamaParse (see aiter_pages)
+        
+        Args:
+            pdf_path: Path to the PDF file
+            pages: Page numbers to parse (1-based)
+            image_dir: Directory to save images
+            
+        Returns:
+            Merged {"pages": {...}} dictionary with global page numbers
+            
+        Raises:
+            RuntimeError: If any shard failed
+        """
+        return await _collect_pages(self.aiter_pages(pdf_path, pages, image_dir))
+    
+    async def aiter_pdf_cached(
+        self,
+        pdf_path: str,
+        cache_dir: str,
+        image_dir: str,
+        pages: Optional[List[int]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the page records of a PDF, serving unchanged pages from the
+        on-disk parse cache (see aparse_pdf_cached)
+        
+        Cache hits are yielded first; parsed pages follow as their shards
+        finish, each stored in the cache as it arrives, so a failed shard
+        doesn't lose the others and the next run only re-parses its pages.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            cache_dir: Root directory of the parse cache
+            image_dir: Directory to save images
+            pages: Only these page numbers (defaults to every page)
+            
+        Yields:
+            Page records including chapter and lecture info
+            
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+            ValueError: If a page number is outside 1..page count
+            RuntimeError: If any shard failed (successful shards are cached)
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        cache = ParseCache(cache_dir, self.settings)
+        page_hashes = await asyncio.to_thread(compute_page_hashes, pdf_path)
+        if pages is None:
+            pages = range(1, len(page_hashes) + 1)
+        out_of_range = sorted(page for page in pages if not 1 <= page <= len(page_hashes))
+        if out_of_range:
+            raise ValueError(
+                f"Pages out of range 1..{len(page_hashes)}: {', '.join(map(str, out_of_range))}"
+            )
+        
+        missing = []
+        for page in pages:
+            record = cache.get(page_hashes[page - 1])
+            if record is None:
+                missing.append(page)
+            else:
+                yield _with_position(page, record)
+        print(f"🗃️  Parse cache: {len(pages) - len(missing)} hits, {len(missing)} misses")
+        
+        if missing:
+            async for record in self.aiter_pages(pdf_path, missing, image_dir):
+                page = record["page"]
+                cache.put(page_hashes[page - 1], record)
+                yield _with_position(page, record)
+    
+    async def aparse_pdf_cached(
+        self,
+        pdf_path: str,
+        cache_dir: str,
+        image_dir: str,
+        pages: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse a PDF, serving unchanged pages from the on-disk parse cache
+        
+        Pages are keyed by content hash plus a fingerprint of the parse
+        settings; only pages missing from the cache are sent to LlamaParse,
+        grouped into contiguous shards of at most max_pages.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            cache_dir: Root directory of the parse cache
+            image_dir: Directory to save images
+            pages: Only these page numbers (defaults to every page)
+            
+        Returns:
+            {"pages": {...}} dictionary for the whole PDF (or the given pages)
+            
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+            ValueError: If a page number is outside 1..page count
+            RuntimeError: If any shard failed (successful shards are cached)
+        """
+        json_result = await _collect_pages(self.aiter_pdf_cached(pdf_path, cache_dir, image_dir, pages))
+        print(f"  ✓ Processed {len(json_result['pages'])} pages")
+        return json_result
+    
+    async def aiter_pdf_triaged(
+        self,
+        pdf_path: str,
+        cache_dir: str,
+        image_dir: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the page records of a PDF parsed with OCR triage (see
+        aparse_pdf_triaged): pages kept local first, then the LlamaParse
+        pages as their shards finish
+        
+        Args:
+            pdf_path: Path to the PDF file
+            cache_dir: Root directory of the parse cache
+            image_dir: Directory to save images
+            
+        Yields:
+            Page records including chapter and lecture info
+            
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+        """
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        local = LocalPDFParser(self.settings, backend=self.settings.triage_extractor)
+        pages = (await asyncio.to_thread(local.build_json_result, pdf_path))["pages"]
+        
+        qualities = triage_pages((page["text"] for page in pages.values()), self.settings)
+        ocr_pages = [q.page for q in qualities if q.needs_ocr]
+        print(f"🔎 OCR triage: {len(pages) - len(ocr_pages)} pages kept local, {len(ocr_pages)} sent to LlamaParse")
+        
+        for q in qualities:
+            record = pages.pop(str(q.page))
+            if not q.needs_ocr:
+                yield record
+        
+        if ocr_pages:
+            if self.settings.use_parse_cache:
+                records = self.aiter_pdf_cached(pdf_path, cache_dir, image_dir, ocr_pages)
+            else:
+                records = self.aiter_pages(pdf_path, ocr_pages, image_dir)
+            async for record in records:
+                yield record
+    
+    async def aparse_pdf_triaged(
+        self,
+        pdf_path: str,
+        cache_dir: str,
+        image_dir: str
+    ) -> Dict[str, Any]:
+        """
+        Parse a PDF locally, sending only pages with a poor text layer to LlamaParse
+        
+        Every page is extracted with settings.triage_extractor and scored
+        (see ocr_triage.py); pages that need OCR are parsed by LlamaParse
+        (through the parse cache if enabled) and replace the local records
+        of the same page numbers.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            cache_dir: Root directory of the parse cache
+            image_dir: Directory to save images
+            
+        Returns:
+            {"pages": {...}} dictionary for the whole PDF, in page order
+            
+        Raises:
+            FileNotFoundError: If PDF file doesn't exist
+        """
+        return await _collect_pages(self.aiter_pdf_triaged(pdf_path, cache_dir, image_dir))
+    
+    def save_markdown_from_json(self, json_result: Dict[str, Any], output_path: str) -> None:
+        """
+        Save markdown for a stitched JSON result, in page order
+        
+        Args:
+            json_result: Dictionary with "pages" as built by build_json_result
+            output_path: Path to save markdown file
+        """
+        print(f"📝 Extracting markdown...")
+        
+        # Create output directory if it doesn't exist
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        
+        with open(output_path, "w", encoding="utf-8") as f:
+            for page in json_result["pages"].values():
+                f.write(page.get("md") or "")
+                f.write("\n\n")
+        
+        print(f"  ✓ Saved: {output_path}")
+    
+    def save_jsonl_result(self, pages: Iterable[Dict[str, Any]], output_path: str) -> None:
+        """
+        Stream page records to a JSON Lines file, one page per line
+        
+        Each record is written as soon as it is produced, so memory stays
+        flat regardless of book size.
+        
+        Args:
+            pages: Iterable of page records (e.g. from iter_page_records)
+            output_path: Path to save JSONL file
+        """
+        print(f"💾 Saving JSONL result...")
+        count = write_jsonl(output_path, pages)
+        print(f"  ✓ Saved {count} pages: {output_path}")
     
     def save_json_result(self, json_result: Dict[str, Any], output_path: str) -> None:
         """
@@ -241,15 +927,216 @@ def run_parser(settings: ParserSettings, paths: PathSettings) -> None:
     # Parse PDF
     text_result, image_result = parser.parse_pdf(paths.input_pdf)
     
-    # Extract markdown
+    # Extract markdown and images, stream JSONL pages
+    image_documents = parser.extract_images(image_result, paths.output_images_dir)
+    _save_parse_outputs(parser, text_result, image_documents, paths)
+
+
+def _save_parse_outputs(parser: PDFParser, text_result, image_documents: List[Any], paths: PathSettings) -> None:
+    """
+    Write markdown and JSONL pages for an already parsed PDF
+    
+    Args:
+        parser: PDFParser instance that produced the results
+        text_result: Result from text parser
+        image_documents: Image documents from extract_images
+        paths: Path settings for output files
+    """
     parser.extract_markdown(text_result, paths.output_markdown)
+    parser.save_jsonl_result(
+        parser.iter_page_records(text_result, image_documents), paths.output_jsonl
+    )
+
+
+async def arun_parser(
+    settings: ParserSettings,
+    paths: PathSettings,
+    parser: Optional[PDFParser] = None
+) -> None:
+    """
+    Run the PDF parser asynchronously (text and image jobs in parallel)
     
-    # Extract images
-    image_documents = parser.extract_images(image_result, paths.output_images_dir)
+    Args:
+        settings: Parser settings
+        paths: Path settings for input/output files
+        parser: PDFParser to use (e.g. one shared by a batch, closed by the
+            caller); defaults to a new one closed when done
+    """
+    own_parser = parser is None
+    parser = parser or PDFParser(settings)
+    try:
+        text_result, image_result = await parser.aparse_pdf(paths.input_pdf)
+        image_documents = await parser.aextract_images(image_result, paths.output_images_dir)
+    finally:
+        if own_parser:
+            await parser.aclose()
+    
+    # File writes are blocking, keep them off the event loop
+    await asyncio.to_thread(_save_parse_outputs, parser, text_result, image_documents, paths)
+
+
+async def arun_parser_batch(
+    settings: ParserSettings,
+    jobs: List[PathSettings],
+    max_concurrency: Optional[int] = None
+) -> None:
+    """
+    Run the PDF parser over many PDFs with bounded concurrency
+    
+    Args:
+        settings: Parser settings
+        jobs: One PathSettings per PDF to parse
+        max_concurrency: Maximum number of PDFs in flight at once
+            (defaults to settings.max_concurrent_jobs)
+    """
+    limit = max_concurrency or settings.max_concurrent_jobs
+    semaphore = asyncio.Semaphore(max(1, limit))
+    # One parser, so all PDFs share the image download pool
+    parser = PDFParser(settings)
+    
+    async def _run_one(paths: PathSettings) -> None:
+        async with semaphore:
+            await arun_parser(settings, paths, parser)
+    
+    try:
+        await asyncio.gather(*(_run_one(paths) for paths in jobs))
+    finally:
+        await parser.aclose()
+    print(f"  ✓ Parsed {len(jobs)} PDFs")
+
+
+async def _awrite_page_stream(records: AsyncIterator[Dict[str, Any]], pages: Iterable[int], paths: PathSettings) -> None:
+    """
+    Write streamed page records to the markdown and JSONL outputs in page order
+
+    Args:
+        records: Page records in any order
+        pages: Page numbers that will arrive
+        paths: Path settings for output files
+    """
+    print(f"💾 Streaming pages to {paths.output_jsonl} and {paths.output_markdown}...")
+    with PageOutputWriter(paths.output_jsonl, paths.output_markdown, pages) as writer:
+        async for record in records:
+            writer.add(record)
+    print(f"  ✓ Saved {writer.count} pages")
+
+
+async def arun_parser_sharded(
+    settings: ParserSettings,
+    paths: PathSettings,
+    ranges: Optional[List[Tuple[int, int]]] = None
+) -> None:
+    """
+    Run the PDF parser over page windows of a large PDF
+    
+    Pages are written as soon as they and every page before them are parsed.
+    
+    Args:
+        settings: Parser settings (max_pages bounds the shard size)
+        paths: Path settings for input/output files
+        ranges: Page ranges to align shards to (defaults to chapter ranges)
+    """
+    parser = PDFParser(settings)
+    try:
+        await _awrite_page_stream(
+            parser.aiter_pdf_sharded(
+                paths.input_pdf, paths.output_shards_dir, paths.output_images_dir, ranges
+            ),
+            range(1, count_pdf_pages(paths.input_pdf) + 1),
+            paths,
+        )
+    finally:
+        await parser.aclose()
+
+
+async def arun_parser_cached(settings: ParserSettings, paths: PathSettings) -> None:
+    """
+    Run the PDF parser, re-parsing only pages missing from the parse cache
+    
+    Pages are written as soon as they and every page before them are ready.
     
-    # Build and save JSON result
-    json_result = parser.build_json_result(text_result, image_documents)
-    parser.save_json_result(json_result, paths.output_json)
+    Args:
+        settings: Parser settings
+        paths: Path settings for input/output files
+    """
+    parser = PDFParser(settings)
+    try:
+        await _awrite_page_stream(
+            parser.aiter_pdf_cached(paths.input_pdf, paths.parse_cache_dir, paths.output_images_dir),
+            range(1, count_pdf_pages(paths.input_pdf) + 1),
+            paths,
+        )
+    finally:
+        await parser.aclose()
+
+
+async def arun_parser_triaged(settings: ParserSettings, paths: PathSettings) -> None:
+    """
+    Run the PDF parser with OCR triage (LlamaParse only for poor text layers)
+    
+    Pages are written as soon as they and every page before them are ready.
+    
+    Args:
+        settings: Parser settings
+        paths: Path settings for input/output files
+    """
+    parser = PDFParser(settings)
+    try:
+        await _awrite_page_stream(
+            parser.aiter_pdf_triaged(paths.input_pdf, paths.parse_cache_dir, paths.output_images_dir),
+            range(1, count_pdf_pages(paths.input_pdf) + 1),
+            paths,
+        )
+    finally:
+        await parser.aclose()
+
+
+def run_local_parser(settings: ParserSettings, paths: PathSettings) -> None:
+    """
+    Run the local (pypdfium2/PyPDF2) backend and write the usual outputs
+    
+    Args:
+        settings: Parser settings (backend selects the extractor)
+        paths: Path settings for input/output files
+    """
+    json_result = LocalPDFParser(settings).build_json_result(paths.input_pdf)
+    parser = PDFParser(settings)
+    parser.save_markdown_from_json(json_result, paths.output_markdown)
+    parser.save_jsonl_result(json_result["pages"].values(), paths.output_jsonl)
+
+
+def run_docling_parser(settings: ParserSettings, paths: PathSettings) -> None:
+    """
+    Run the docling backend and write the usual outputs plus docling's dicts
+    
+    Args:
+        settings: Parser settings (docling_* settings)
+        paths: Path settings for input/output files
+    """
+    # docling pulls in torch; only import it when this backend is used
+    from docling_parser import DoclingPDFParser
+    
+    json_result, documents = DoclingPDFParser(settings).parse_pdf(paths.input_pdf)
+    parser = PDFParser(settings)
+    parser.save_markdown_from_json(json_result, paths.output_markdown)
+    parser.save_jsonl_result(json_result["pages"].values(), paths.output_jsonl)
+    parser.save_json_result({"ranges": documents}, paths.output_docling_json)
+
+
+def run_parser_batch(
+    settings: ParserSettings,
+    jobs: List[PathSettings],
+    max_concurrency: Optional[int] = None
+) -> None:
+    """
+    Synchronous entry point for arun_parser_batch()
+    
+    Args:
+        settings: Parser settings
+        jobs: One PathSettings per PDF to parse
+        max_concurrency: Maximum number of PDFs in flight at once
+    """
+    asyncio.run(arun_parser_batch(settings, jobs, max_concurrency))
 
 
 def main():
@@ -264,8 +1151,23 @@ def main():
         settings = load_settings_from_env()
         paths = get_default_paths()
         
-        # Run parser
-        run_parser(settings, paths)
+        # Run parser (text and image jobs in parallel); with the parse cache
+        # only new or edited pages are parsed, otherwise books longer than
+        # max_pages are parsed as page-window shards. Local backends read the
+        # text layer offline instead; with OCR triage only pages whose text
+        # layer is poor go to LlamaParse
+        if settings.backend == "docling":
+            run_docling_parser(settings, paths)
+        elif settings.backend != "llamaparse":
+            run_local_parser(settings, paths)
+        elif settings.ocr_triage:
+            asyncio.run(arun_parser_triaged(settings, paths))
+        elif settings.use_parse_cache:
+            asyncio.run(arun_parser_cached(settings, paths))
+        elif count_pdf_pages(paths.input_pdf) > settings.max_pages:
+            asyncio.run(arun_parser_sharded(settings, paths))
+        else:
+            asyncio.run(arun_parser(settings, paths))
         
         print()
         print("=" * 60)
@@ -0,0 +1,223 @@
+"""
+PDF Page Sharding
+
+Splits a PDF into page windows so large books can be parsed as several
+smaller jobs (each within ParserSettings.max_pages) and stitched back
+together with global page numbers. Shard files live in a subdirectory
+named after the source PDF's content hash and the parse settings'
+fingerprint, so a replaced input.pdf, another book parsed with the same
+paths or changed parse settings never reuse stale shards.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from biology_textbook import BiologyTextbook, BIOLOGY_TEXTBOOK
+
+
+@dataclass
+class PageShard:
+    """A contiguous page window of the source PDF (1-based, inclusive)"""
+    index: int
+    first_page: int
+    last_page: int
+
+    @property
+    def page_offset(self) -> int:
+        """Offset to add to a shard-local page number to get the global one"""
+        return self.first_page - 1
+
+    @property
+    def name(self) -> str:
+        return f"shard_{self.first_page:04d}-{self.last_page:04d}"
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    """Return the number of pages in a PDF file"""
+    return len(PdfReader(pdf_path).pages)
+
+
+def pdf_digest(pdf_path: str) -> str:
+    """Return the SHA-256 hex digest of a PDF file's bytes"""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_shard_dir(shard_dir: str, pdf_path: str, settings_key: str = "") -> str:
+    """
+    Directory for the shard files of one source PDF and parse configuration
+
+    Args:
+        shard_dir: Root directory for shard files
+        pdf_path: Path to the source PDF
+        settings_key: Fingerprint of the parse settings (see
+            parse_cache.settings_fingerprint)
+
+    Returns:
+        shard_dir/<first 16 hex digits of the PDF's content hash>, with
+        "_<first 16 hex digits of settings_key>" appended if given
+    """
+    name = pdf_digest(pdf_path)[:16]
+    if settings_key:
+        name = f"{name}_{settings_key[:16]}"
+    return os.path.join(shard_dir, name)
+
+
+def get_chapter_ranges(textbook: BiologyTextbook = BIOLOGY_TEXTBOOK) -> List[Tuple[int, int]]:
+    """
+    Get the (from, to) page range of every chapter in a textbook
+
+    Args:
+        textbook: BiologyTextbook instance
+
+    Returns:
+        List of (first_page, last_page) tuples in chapter order
+    """
+    return [(ch.range_from, ch.range_to) for ch in textbook.chapters]
+
+
+def plan_shards(
+    total_pages: int,
+    max_pages: int,
+    ranges: Optional[List[Tuple[int, int]]] = None
+) -> List[PageShard]:
+    """
+    Plan page windows covering every page of the PDF exactly once
+
+    Given ranges (e.g. chapter ranges) are used as window boundaries; pages
+    not covered by any range are grouped into their own windows. Any window
+    longer than max_pages is split further.
+
+    Args:
+        total_pages: Number of pages in the PDF
+        max_pages: Maximum number of pages per shard
+        ranges: Optional (first_page, last_page) boundaries to align to
+
+    Returns:
+        List of PageShard in page order
+    """
+    max_pages = max(1, max_pages)
+    boundaries: List[Tuple[int, int]] = []
+    next_page = 1
+
+    for first, last in sorted(ranges or []):
+        first, last = max(first, next_page), min(last, total_pages)
+        if first > last:
+            continue
+        if first > next_page:
+            boundaries.append((next_page, first - 1))
+        boundaries.append((first, last))
+        next_page = last + 1
+
+    if next_page <= total_pages:
+        boundaries.append((next_page, total_pages))
+
+    shards: List[PageShard] = []
+    for first, last in boundaries:
+        for start in range(first, last + 1, max_pages):
+            end = min(start + max_pages - 1, last)
+            shards.append(PageShard(index=len(shards), first_page=start, last_page=end))
+    return shards
+
+
+def shards_for_pages(pages: List[int], max_pages: int) -> List[PageShard]:
+    """
+    Group page numbers into shards of contiguous runs
+
+    Args:
+        pages: Page numbers to cover (1-based, any order)
+        max_pages: Maximum number of pages per shard
+
+    Returns:
+        List of PageShard covering exactly the given pages
+    """
+    max_pages = max(1, max_pages)
+    shards: List[PageShard] = []
+    for page in sorted(set(pages)):
+        last = shards[-1] if shards else None
+        if last and page == last.last_page + 1 and page - last.first_page < max_pages:
+            last.last_page = page
+        else:
+            shards.append(PageShard(index=len(shards), first_page=page, last_page=page))
+    return shards
+
+
+def write_shard_pdf(pdf_path: str, shard: PageShard, shard_dir: str) -> str:
+    """
+    Write the pages of one shard to a standalone PDF file
+
+    Args:
+        pdf_path: Path to the source PDF
+        shard: Page window to extract
+        shard_dir: Directory for shard files
+
+    Returns:
+        Path to the shard PDF
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    shard_path = os.path.join(shard_dir, f"{shard.name}.pdf")
+    if os.path.exists(shard_path):
+        return shard_path
+
+    reader = PdfReader(pdf_path)
+    writer = PdfWriter()
+    for page_number in range(shard.first_page, shard.last_page + 1):
+        writer.add_page(reader.pages[page_number - 1])
+
+    with open(shard_path, "wb") as f:
+        writer.write(f)
+    return shard_path
+
+
+def shard_result_path(shard: PageShard, shard_dir: str) -> str:
+    """Path of the JSON result file for a shard"""
+    return os.path.join(shard_dir, f"{shard.name}.json")
+
+
+def load_shard_result(shard: PageShard, shard_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a previously saved shard result, if present
+
+    Args:
+        shard: Page window
+        shard_dir: Directory for shard files
+
+    Returns:
+        The shard's {"pages": {...}} dict, or None if it has not been parsed yet
+    """
+    path = shard_result_path(shard, shard_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_shard_result(shard: PageShard, shard_dir: str, result: Dict[str, Any]) -> None:
+    """Save a shard's {"pages": {...}} dict so it isn't re-parsed on the next run"""
+    os.makedirs(shard_dir, exist_ok=True)
+    with open(shard_result_path(shard, shard_dir), "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+
+
+def merge_shard_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Stitch shard results into one {"pages": {...}} document in page order
+
+    Args:
+        results: Shard results whose page keys are already global page numbers
+
+    Returns:
+        Merged dictionary
+    """
+    pages: Dict[str, Any] = {}
+    for result in results:
+        pages.update(result["pages"])
+    return {"pages": {key: pages[key] for key in sorted(pages, key=int)}}
@@ -0,0 +1,65 @@
+"""
+Persian Text Normalization
+
+Python port of `normalizePersian` from lib/vector-prep.ts (Arabic → Persian
+letters, diacritics and tatweel stripped), plus the tokenizer used by the
+lexical (BM25) index so queries and documents are normalized identically.
+"""
+
+import re
+from typing import List
+
+ARABIC_TO_PERSIAN = str.maketrans({
+    "ي": "ی",
+    "ك": "ک",
+    "ة": "ه",
+    "ؤ": "و",
+    "إ": "ا",
+    "أ": "ا",
+    "ٱ": "ا",
+})
+
+ARABIC_DIACRITICS = re.compile(r"[\u064B-\u065F\u0670\u06D6-\u06ED]")  # harakat
+TATWEEL = re.compile(r"\u0640")  # ـ
+
+_PUNCT_SPACING = re.compile(r"\s*([،؛:!?])\s*")
+_DOT_SPACING = re.compile(r"\s*([.])\s*")
+_WHITESPACE = re.compile(r"\s+")
+
+# Words are runs of letters/digits; ZWNJ (U+200C) splits "یاخته‌ها" into
+# "یاخته" + "ها" so the bare stem matches its plural
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_persian(text: str) -> str:
+    """
+    Normalize Persian text the same way as lib/vector-prep.ts
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    if not text:
+        return ""
+    t = text.translate(ARABIC_TO_PERSIAN)
+    t = ARABIC_DIACRITICS.sub("", t)
+    t = TATWEEL.sub("", t)
+    # normalize punctuation spacing
+    t = _PUNCT_SPACING.sub(r"\1 ", t)
+    t = _DOT_SPACING.sub(". ", t)
+    return _WHITESPACE.sub(" ", t).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split normalized text into lowercase terms for lexical search
+
+    Args:
+        text: Raw or normalized text
+
+    Returns:
+        List of terms
+    """
+    return _TOKEN.findall(normalize_persian(text).lower())
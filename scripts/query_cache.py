@@ -0,0 +1,194 @@
+"""
+Query-Level Answer Cache
+
+Two-tier cache in front of the query engine:
+  1. exact tier - keyed by the normalized question text (and filters)
+  2. semantic tier - serves a stored answer when a new question's embedding
+     is within a cosine-similarity threshold of a previously asked one
+
+Both tiers use LRU + TTL eviction and are cleared whenever the index
+version (e.g. the mtimes of the persisted index files) changes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metadata_filter import RetrievalFilters
+from persian_text import normalize_persian
+
+# Trailing punctuation that doesn't change the question
+_TRAILING_PUNCT = " ?؟.!،"
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact matching (Persian letters, spacing, case)"""
+    return normalize_persian(question).lower().rstrip(_TRAILING_PUNCT)
+
+
+def index_version(paths: Iterable[Path]) -> Tuple[float, ...]:
+    """
+    Version stamp of a persisted index: modification times of its files
+
+    Args:
+        paths: Index files (missing files count as 0)
+
+    Returns:
+        Tuple that changes whenever any file is rewritten
+    """
+    return tuple(path.stat().st_mtime if path.exists() else 0.0 for path in paths)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    created: float
+    embedding: Optional[np.ndarray] = None
+
+
+class QueryCache:
+    """LRU/TTL answer cache with exact and embedding-similarity tiers"""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        similarity_threshold: float = 0.95,
+        version_fn: Optional[Callable[[], Hashable]] = None,
+    ):
+        """
+        Args:
+            max_entries: Maximum cached questions (least recently used evicted)
+            ttl_seconds: Entry lifetime
+            similarity_threshold: Minimum cosine similarity for the semantic
+                tier (>= 1 disables it)
+            version_fn: Returns the current index version; a change clears
+                the cache
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._version_fn = version_fn
+        self._version = version_fn() if version_fn else None
+        self._entries: "OrderedDict[Tuple[str, Tuple], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.similarity_threshold < 1.0
+
+    @staticmethod
+    def _key(question: str, filters: Optional[RetrievalFilters]) -> Tuple[str, Tuple]:
+        f = filters or RetrievalFilters()
+        return normalize_question(question), (f.chapter_id, f.lecture_id, f.page_from, f.page_to)
+
+    def _check_version(self) -> None:
+        if self._version_fn is None:
+            return
+        version = self._version_fn()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in LRU order, but TTL is by creation time
+        expired = [k for k, e in self._entries.items() if now - e.created > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, question: str, filters: Optional[RetrievalFilters] = None) -> Optional[Any]:
+        """
+        Exact-tier lookup
+
+        Args:
+            question: Question text
+            filters: Retrieval filters the answer was produced with
+
+        Returns:
+            Cached answer, or None
+        """
+        key = self._key(question, filters)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def get_similar(
+        self,
+        embedding: Sequence[float],
+        filters: Optional[RetrievalFilters] = None
+    ) -> Optional[Any]:
+        """
+        Semantic-tier lookup
+
+        Args:
+            embedding: Embedding of the new question
+            filters: Retrieval filters (only answers with the same filters match)
+
+        Returns:
+            Answer of the most similar cached question above the threshold, or None
+        """
+        if not self.semantic_enabled:
+            return None
+        scope = self._key("", filters)[1]
+        q = np.asarray(embedding, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        with self._lock:
+            self._check_version()
+            self._expire(time.monotonic())
+            keys = [k for k, e in self._entries.items() if k[1] == scope and e.embedding is not None]
+            if not keys:
+                return None
+            matrix = np.stack([self._entries[k].embedding for k in keys])
+            scores = matrix @ q
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            self._entries.move_to_end(keys[best])
+            return self._entries[keys[best]].value
+
+    def put(
+        self,
+        question: str,
+        value: Any,
+        filters: Optional[RetrievalFilters] = None,
+        embedding: Optional[Sequence[float]] = None
+    ) -> None:
+        """
+        Store an answer
+
+        Args:
+            question: Question text
+            value: Answer to cache (e.g. a LlamaIndex Response)
+            filters: Retrieval filters used
+            embedding: Question embedding, enables the semantic tier for it
+        """
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            vector /= np.linalg.norm(vector) or 1.0
+        key = self._key(question, filters)
+        with self._lock:
+            self._check_version()
+            self._entries[key] = _Entry(value=value, created=time.monotonic(), embedding=vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
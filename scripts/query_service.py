@@ -0,0 +1,350 @@
+"""
+Async HTTP Query Service
+
+Serves the semantic index over HTTP so the web frontend (and many users
+at once) can query it. The index, vector store and BM25 index are loaded
+once at startup by importing semantic_query.
+
+Endpoints:
+    POST /retrieve  {"question": "...", "filters": {...}, "top_k": 5}
+                    -> ranked source nodes, no LLM call
+    POST /query     {"question": "...", "filters": {...}, "stream": false}
+                    -> answer plus source nodes; with "stream": true an
+                       NDJSON stream of sources first, then answer tokens
+    GET  /health
+
+"filters" takes RetrievalFilters fields (chapter_id, lecture_id, page_from,
+page_to); without it, leading "ch:2 lec:1 p:18-24" tokens in the question
+are used, as in the REPL.
+
+Question embeddings from concurrent requests are micro-batched into one
+embedding request (questions that take the lexical fast path aren't
+embedded), retrieval runs in worker threads so scoring and store reads
+don't block the event loop, and chat completions are capped by a
+semaphore. Set OPENAI_BASE_URL to the openai_stub.py address to run it
+offline.
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.base.response.schema import Response
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+import semantic_query
+from config import ServiceSettings, load_service_settings
+from embedding_cache import aget_query_embedding_batch
+from metadata_filter import RetrievalFilters, parse_filters
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding calls into batch requests
+
+    A batch is sent once max_batch_size texts are waiting or max_wait_ms
+    after its first text arrived, whichever comes first. Batches are
+    dispatched as tasks, so a slow request doesn't hold back the next batch.
+    """
+
+    def __init__(self, embed_model: BaseEmbedding, max_batch_size: int = 32, max_wait_ms: float = 10.0):
+        """
+        Args:
+            embed_model: Model used for the batch calls
+            max_batch_size: Maximum texts per embedding request
+            max_wait_ms: How long the first text of a batch waits for company
+        """
+        self.embed_model = embed_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: set = set()
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, *self._pending, return_exceptions=True)
+            self._worker = None
+
+    async def embed(self, text: str) -> List[float]:
+        """Embedding of one query text, computed in a shared batch"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._flush(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            vectors = await aget_query_embedding_batch(self.embed_model, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _node_json(hit: NodeWithScore, include_text: bool = True) -> Dict[str, Any]:
+    result = {
+        "node_id": hit.node.node_id,
+        "score": hit.score,
+        "metadata": hit.node.metadata,
+    }
+    if include_text:
+        result["text"] = hit.node.get_content()
+    return result
+
+
+async def _read_body(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=f"Invalid JSON body: {e}")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="JSON body must be an object")
+    return body
+
+
+def _parse_top_k(body: Dict[str, Any]) -> Optional[int]:
+    top_k = body.get("top_k")
+    if top_k is None:
+        return None
+    # Booleans are ints in Python and 2.5 would silently become 2
+    if isinstance(top_k, bool) or (isinstance(top_k, float) and not top_k.is_integer()):
+        top_k = 0
+    try:
+        top_k = int(top_k)
+    except (TypeError, ValueError):
+        top_k = 0
+    if top_k < 1:
+        raise web.HTTPBadRequest(text="'top_k' must be a positive integer")
+    return top_k
+
+
+def _parse_request(body: Dict[str, Any]) -> Tuple[str, Optional[RetrievalFilters]]:
+    question = str(body.get("question") or "").strip()
+    if "filters" in body:
+        fields = body["filters"] or {}
+        try:
+            filters = RetrievalFilters(**{k: int(v) for k, v in fields.items() if v is not None})
+        except (AttributeError, TypeError, ValueError) as e:
+            raise web.HTTPBadRequest(text=f"Invalid filters: {e}")
+    else:
+        filters, question = parse_filters(question)
+    if not question:
+        raise web.HTTPBadRequest(text="Missing 'question'")
+    return question, None if filters.is_empty() else filters
+
+
+class QueryService:
+    """Request handlers sharing the embedding batcher and the LLM limit"""
+
+    def __init__(self, settings: ServiceSettings):
+        self.settings = settings
+        self.batcher = EmbeddingBatcher(
+            semantic_query.Settings.embed_model,
+            max_batch_size=settings.embed_batch_size,
+            max_wait_ms=settings.embed_batch_wait_ms,
+        )
+        self.llm_limit = asyncio.Semaphore(settings.max_concurrent_llm)
+
+    async def _query_bundle(self, question: str) -> QueryBundle:
+        query_bundle = QueryBundle(question)
+        if semantic_query.needs_embedding(question):
+            query_bundle.embedding = await self.batcher.embed(question)
+        return query_bundle
+
+    @staticmethod
+    def _retrieve_sync(
+        query_bundle: QueryBundle,
+        filters: Optional[RetrievalFilters],
+        top_k: Optional[int] = None
+    ) -> List[NodeWithScore]:
+        hits = semantic_query.build_retriever(filters, top_k).retrieve(query_bundle)
+        # asynthesize() skips the engine's postprocessors (e.g. sentence-window
+        # expansion), so they are applied here
+        for postprocessor in semantic_query.node_postprocessors():
+            hits = postprocessor.postprocess_nodes(hits, query_bundle=query_bundle)
+        return hits
+
+    async def _retrieve(
+        self,
+        query_bundle: QueryBundle,
+        filters: Optional[RetrievalFilters],
+        top_k: Optional[int] = None
+    ) -> List[NodeWithScore]:
+        # The retrievers only have sync _retrieve (matmuls, argpartition and
+        # side-table reads), which aretrieve() would run on the event loop
+        return await asyncio.to_thread(self._retrieve_sync, query_bundle, filters, top_k)
+
+    async def retrieve(self, request: web.Request) -> web.Response:
+        body = await _read_body(request)
+        question, filters = _parse_request(body)
+        top_k = _parse_top_k(body)
+        query_bundle = await self._query_bundle(question)
+        hits = await self._retrieve(query_bundle, filters, top_k)
+        return web.json_response(
+            {"question": question, "nodes": [_node_json(hit) for hit in hits]},
+            dumps=_dumps,
+        )
+
+    async def query(self, request: web.Request) -> web.StreamResponse:
+        body = await _read_body(request)
+        question, filters = _parse_request(body)
+        cache = semantic_query.answer_cache
+
+        response = cache.get(question, filters)
+        query_bundle = None
+        if response is None:
+            query_bundle = await self._query_bundle(question)
+            if query_bundle.embedding is not None:
+                response = cache.get_similar(query_bundle.embedding, filters)
+
+        cached = response is not None
+        if body.get("stream"):
+            return await self._stream_answer(request, question, filters, query_bundle, response)
+
+        if not cached:
+            hits = await self._retrieve(query_bundle, filters)
+            async with self.llm_limit:
+                response = await semantic_query.query_engine.asynthesize(query_bundle, hits)
+            cache.put(question, response, filters, query_bundle.embedding)
+
+        return web.json_response(
+            {
+                "question": question,
+                "answer": str(response),
+                "cached": cached,
+                "sources": [_node_json(hit, include_text=False) for hit in response.source_nodes],
+            },
+            dumps=_dumps,
+        )
+
+    async def _stream_answer(
+        self,
+        request: web.Request,
+        question: str,
+        filters: Optional[RetrievalFilters],
+        query_bundle: Optional[QueryBundle],
+        cached: Optional[Response]
+    ) -> web.StreamResponse:
+        """
+        Stream an answer as NDJSON events
+
+        {"type": "sources", ...} is sent as soon as retrieval finishes, then
+        one {"type": "token", "text": ...} per completion chunk and a final
+        {"type": "done"}.
+        """
+        stream = web.StreamResponse(headers={"Content-Type": "application/x-ndjson; charset=utf-8"})
+        await stream.prepare(request)
+
+        async def send(event: Dict[str, Any]) -> None:
+            await stream.write((_dumps(event) + "\n").encode("utf-8"))
+
+        hits = cached.source_nodes if cached is not None else await self._retrieve(query_bundle, filters)
+        await send({
+            "type": "sources",
+            "question": question,
+            "cached": cached is not None,
+            "sources": [_node_json(hit, include_text=False) for hit in hits],
+        })
+
+        if cached is not None:
+            await send({"type": "token", "text": str(cached)})
+        else:
+            async with self.llm_limit:
+                response = await semantic_query.streaming_query_engine.asynthesize(query_bundle, hits)
+                tokens = semantic_query.acache_stream(
+                    response.async_response_gen(), query_bundle, hits, filters
+                )
+                async for token in tokens:
+                    if token:
+                        await send({"type": "token", "text": token})
+
+        await send({"type": "done"})
+        await stream.write_eof()
+        return stream
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+
+def create_app(settings: Optional[ServiceSettings] = None) -> web.Application:
+    """
+    Build the service application
+
+    Args:
+        settings: Service settings (defaults to load_service_settings())
+
+    Returns:
+        aiohttp Application
+    """
+    settings = settings or load_service_settings()
+    app = web.Application()
+    service: Optional[QueryService] = None
+
+    async def on_startup(app: web.Application) -> None:
+        nonlocal service
+        # asyncio primitives must be created inside the running loop
+        service = QueryService(settings)
+        service.batcher.start()
+
+    async def on_cleanup(app: web.Application) -> None:
+        if service is not None:
+            await service.batcher.stop()
+
+    def route(name: str):
+        async def handler(request: web.Request) -> web.Response:
+            return await getattr(service, name)(request)
+        return handler
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_post("/retrieve", route("retrieve"))
+    app.router.add_post("/query", route("query"))
+    app.router.add_get("/health", route("health"))
+    return app
+
+
+def main():
+    settings = load_service_settings()
+    parser = argparse.ArgumentParser(description="HTTP query service for the semantic index")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    args = parser.parse_args()
+
+    web.run_app(create_app(settings), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
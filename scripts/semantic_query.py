@@ -1,29 +1,44 @@
 from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 
 from llama_index.core import Settings, StorageContext, load_index_from_storage
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.base.response.schema import Response, StreamingResponse
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
 from llama_index.core.prompts import PromptTemplate
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import NodeWithScore, QueryBundle
 from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
-from config import load_openai_settings
+from bm25_index import BM25Index, BM25Retriever, HybridRetriever, is_lexical_query
+from config import load_openai_settings, load_retrieval_settings
+from embedding_cache import build_embed_model
+from metadata_filter import RetrievalFilters, parse_filters
+from numpy_vector_store import NumpyRetriever, NumpyVectorStore
+from query_cache import QueryCache, index_version
+from sentence_windows import SentenceStore, SentenceWindowPostprocessor
 
 BASE_DIR = Path(__file__).parent
-STORAGE_DIR = BASE_DIR / "out/semantic_index"
-
 openai_config = load_openai_settings()
+retrieval_config = load_retrieval_settings()
+
+# Indexes written by make_semantic_index.py, per node type
+if retrieval_config.node_type == "sentence_window":
+    STORAGE_DIR = BASE_DIR / "out/sentence_index"
+    VECTORS_DIR = BASE_DIR / "out/sentence_vectors"
+    BM25_DIR = BASE_DIR / "out/sentence_bm25"
+else:
+    STORAGE_DIR = BASE_DIR / "out/semantic_index"
+    VECTORS_DIR = BASE_DIR / "out/semantic_vectors"
+    BM25_DIR = BASE_DIR / "out/semantic_bm25"
+SENTENCE_STORE_DIR = BASE_DIR / "out/sentence_store"
 
 Settings.llm = OpenAI(
     model=openai_config.chat_model,
     api_key=openai_config.api_key,
+    api_base=openai_config.base_url,
 )
 
-Settings.embed_model = OpenAIEmbedding(
-    model=openai_config.embedding_model,
-    api_key=openai_config.api_key,
-)
-
-# 1) Load existing index
-storage_context = StorageContext.from_defaults(persist_dir=str(STORAGE_DIR))
-index = load_index_from_storage(storage_context=storage_context)
+Settings.embed_model = build_embed_model(openai_config)
 
 # 2) Create query engine with custom prompt
 SYSTEM_PROMPT = """
@@ -43,26 +58,309 @@ qa_prompt_tmpl = PromptTemplate(
     "Final answer (in simple Persian):"
 )
 
-query_engine = index.as_query_engine(
-    similarity_top_k=5,
-    text_qa_template=qa_prompt_tmpl,
-    response_mode=response_mode,
+
+_numpy_store: Optional[NumpyVectorStore] = None
+_bm25_index: Optional[BM25Index] = None
+_index = None
+_sentence_store: Optional[SentenceStore] = None
+
+
+def build_vector_retriever(
+    filters: Optional[RetrievalFilters] = None,
+    top_k: Optional[int] = None
+) -> BaseRetriever:
+    """
+    Open the configured vector backend
+
+    The "numpy" backend memory-maps out/semantic_vectors (written by
+    make_semantic_index.py); otherwise the LlamaIndex storage is loaded.
+    Either store is opened once and shared by all retrievers.
+
+    Args:
+        filters: Optional chapter/lecture/page restrictions; with the numpy
+            backend they narrow the candidate rows before scoring
+        top_k: Number of nodes (defaults to similarity_top_k)
+    """
+    global _numpy_store, _index
+    top_k = top_k or retrieval_config.similarity_top_k
+    if retrieval_config.vector_backend == "numpy" and (VECTORS_DIR / "vectors.npy").exists():
+        if _numpy_store is None:
+            _numpy_store = NumpyVectorStore(VECTORS_DIR)
+        return NumpyRetriever(
+            _numpy_store, Settings.embed_model, similarity_top_k=top_k, filters=filters
+        )
+
+    # 1) Load existing index
+    if _index is None:
+        storage_context = StorageContext.from_defaults(persist_dir=str(STORAGE_DIR))
+        _index = load_index_from_storage(storage_context=storage_context)
+    return _index.as_retriever(
+        similarity_top_k=top_k,
+        filters=filters.to_llama_filters() if filters else None,
+    )
+
+
+def load_bm25_index() -> Optional[BM25Index]:
+    """Open out/semantic_bm25 once (None if the mode is "vector" or it wasn't built)"""
+    global _bm25_index
+    if retrieval_config.retrieval_mode == "vector" or not (BM25_DIR / "bm25.npz").exists():
+        return None
+    if _bm25_index is None:
+        _bm25_index = BM25Index(BM25_DIR)
+    return _bm25_index
+
+
+def build_retriever(
+    filters: Optional[RetrievalFilters] = None,
+    top_k: Optional[int] = None
+) -> BaseRetriever:
+    """
+    Create the retriever for the configured retrieval mode
+
+    "lexical" and "hybrid" need out/semantic_bm25 (written by
+    make_semantic_index.py) and fall back to vector search without it.
+
+    Args:
+        filters: Optional chapter/lecture/page restrictions
+        top_k: Number of nodes (defaults to similarity_top_k)
+    """
+    mode = retrieval_config.retrieval_mode
+    top_k = top_k or retrieval_config.similarity_top_k
+    bm25_index = load_bm25_index()
+    if bm25_index is None:
+        return build_vector_retriever(filters, top_k)
+
+    if mode == "lexical":
+        return BM25Retriever(bm25_index, similarity_top_k=top_k, filters=filters)
+
+    # Fuse deeper candidate lists than the final top-k
+    depth = top_k * 4
+    return HybridRetriever(
+        build_vector_retriever(filters, top_k=depth),
+        BM25Retriever(bm25_index, similarity_top_k=depth, filters=filters),
+        similarity_top_k=top_k,
+        lexical_max_terms=retrieval_config.lexical_max_terms,
+    )
+
+
+def needs_embedding(question: str) -> bool:
+    """
+    Whether retrieving for a question embeds it
+
+    False in "lexical" mode and for hybrid queries that take the
+    lexical-only fast path (short exact-term lookups), so callers only pay
+    for an embedding when vector search will actually run.
+    """
+    bm25_index = load_bm25_index()
+    if bm25_index is None:
+        return True
+    if retrieval_config.retrieval_mode == "lexical":
+        return False
+    return not is_lexical_query(bm25_index, question, retrieval_config.lexical_max_terms)
+
+
+def node_postprocessors() -> List[BaseNodePostprocessor]:
+    """
+    Postprocessors applied to retrieved nodes before synthesis
+
+    With sentence-window nodes, each retrieved sentence is expanded to its
+    window, so the prompt gets small, precise passages instead of whole
+    semantic chunks.
+    """
+    global _sentence_store
+    if retrieval_config.node_type != "sentence_window":
+        return []
+    if _sentence_store is None:
+        _sentence_store = SentenceStore(SENTENCE_STORE_DIR)
+    return [SentenceWindowPostprocessor(_sentence_store)]
+
+
+def build_query_engine(
+    filters: Optional[RetrievalFilters] = None,
+    streaming: bool = False
+) -> RetrieverQueryEngine:
+    """
+    Create a query engine, optionally restricted to a chapter/lecture/page range
+
+    Args:
+        filters: Optional chapter/lecture/page restrictions
+        streaming: Return StreamingResponse objects whose tokens arrive as
+            the completion is generated
+    """
+    return RetrieverQueryEngine.from_args(
+        build_retriever(filters),
+        text_qa_template=qa_prompt_tmpl,
+        response_mode=response_mode,
+        node_postprocessors=node_postprocessors(),
+        streaming=streaming,
+    )
+
+
+query_engine = build_query_engine()
+streaming_query_engine = build_query_engine(streaming=True)
+
+# Cached answers are dropped whenever make_semantic_index.py rewrites the index
+answer_cache = QueryCache(
+    max_entries=retrieval_config.query_cache_size,
+    ttl_seconds=retrieval_config.query_cache_ttl,
+    similarity_threshold=retrieval_config.semantic_cache_threshold,
+    version_fn=lambda: index_version([
+        STORAGE_DIR / "docstore.json",
+        VECTORS_DIR / "vectors.npy",
+        BM25_DIR / "bm25.npz",
+    ]),
 )
 
+
+def get_query_engine(
+    filters: Optional[RetrievalFilters] = None,
+    streaming: bool = False
+) -> RetrieverQueryEngine:
+    """Shared engine when unfiltered, otherwise a new filtered one"""
+    if filters is None or filters.is_empty():
+        return streaming_query_engine if streaming else query_engine
+    return build_query_engine(filters, streaming)
+
+
+def lookup_answer(
+    question: str,
+    filters: Optional[RetrievalFilters] = None
+) -> Tuple[Optional[Response], QueryBundle]:
+    """
+    Look a question up in answer_cache
+
+    Exact matches on the normalized text are tried first, then
+    near-duplicates by embedding similarity. The question embedding is
+    computed at most once and left on the returned QueryBundle for
+    retrieval; questions that retrieval won't embed (see needs_embedding)
+    skip the similarity tier.
+
+    Args:
+        question: Student's question
+        filters: Optional chapter/lecture/page restrictions
+
+    Returns:
+        (cached Response or None, QueryBundle for the question)
+    """
+    query_bundle = QueryBundle(question)
+    if retrieval_config.query_cache_size <= 0:
+        return None, query_bundle
+
+    cached = answer_cache.get(question, filters)
+    if cached is None and answer_cache.semantic_enabled and needs_embedding(question):
+        query_bundle.embedding = Settings.embed_model.get_query_embedding(question)
+        cached = answer_cache.get_similar(query_bundle.embedding, filters)
+    return cached, query_bundle
+
+
+def cache_stream(
+    tokens: Iterator[str],
+    query_bundle: QueryBundle,
+    source_nodes: List[NodeWithScore],
+    filters: Optional[RetrievalFilters] = None
+) -> Iterator[str]:
+    """Pass tokens through, caching the full answer once the stream completes"""
+    parts = []
+    for token in tokens:
+        parts.append(token)
+        yield token
+    answer_cache.put(
+        query_bundle.query_str, Response("".join(parts), source_nodes), filters, query_bundle.embedding
+    )
+
+
+async def acache_stream(
+    tokens: AsyncIterator[str],
+    query_bundle: QueryBundle,
+    source_nodes: List[NodeWithScore],
+    filters: Optional[RetrievalFilters] = None
+) -> AsyncIterator[str]:
+    """Async version of cache_stream"""
+    parts = []
+    async for token in tokens:
+        parts.append(token)
+        yield token
+    answer_cache.put(
+        query_bundle.query_str, Response("".join(parts), source_nodes), filters, query_bundle.embedding
+    )
+
+
+def query(question: str, filters: Optional[RetrievalFilters] = None) -> Response:
+    """
+    Answer a question, searching only the nodes matching filters (if any)
+
+    Repeated questions are served from answer_cache (see lookup_answer).
+
+    Args:
+        question: Student's question
+        filters: Optional chapter/lecture/page restrictions
+
+    Returns:
+        LlamaIndex Response with source_nodes
+    """
+    cached, query_bundle = lookup_answer(question, filters)
+    if cached is not None:
+        return cached
+
+    response = get_query_engine(filters).query(query_bundle)
+    answer_cache.put(question, response, filters, query_bundle.embedding)
+    return response
+
+
+def stream_query(question: str, filters: Optional[RetrievalFilters] = None) -> StreamingResponse:
+    """
+    Answer a question, yielding tokens as the completion arrives
+
+    Retrieval finishes before the first token, so source_nodes are
+    available as soon as this returns; iterate response_gen for the answer.
+    Cached answers come back as a single-token stream.
+
+    Args:
+        question: Student's question
+        filters: Optional chapter/lecture/page restrictions
+
+    Returns:
+        LlamaIndex StreamingResponse with source_nodes and response_gen
+    """
+    cached, query_bundle = lookup_answer(question, filters)
+    if cached is not None:
+        return StreamingResponse(response_gen=iter([str(cached)]), source_nodes=cached.source_nodes)
+
+    response = get_query_engine(filters, streaming=True).query(query_bundle)
+    response.response_gen = cache_stream(
+        response.response_gen, query_bundle, response.source_nodes, filters
+    )
+    return response
+
+
+def print_sources(source_nodes: List[NodeWithScore]) -> None:
+    print("\n📚 Sources used:")
+    for src in source_nodes:
+        meta = src.metadata or {}
+        print(
+            f"- page={meta.get('page')}, "
+            f"chapter={meta.get('chapter_title')}, "
+            f"score={src.score:.3f}"
+        )
+
+
 if __name__ == "__main__":
     while True:
-        q = input("\n❓ Your question about biology (exit to quit): ")
+        q = input("\n❓ Your question about biology (ch:2 lec:1 p:18-24 to narrow, exit to quit): ")
         if q.strip().lower() in ["exit", "quit"]:
             break
 
-        resp = query_engine.query(q)
-        print("\n🧠 Answer:\n", resp)
-        # If you want to also print the sources:
-        print("\n📚 Sources used:")
-        for src in resp.source_nodes:
-            meta = src.metadata or {}
-            print(
-                f"- page={meta.get('page')}, "
-                f"chapter={meta.get('chapter_title')}, "
-                f"score={src.score:.3f}"
-            )
\ No newline at end of file
+        filters, q = parse_filters(q)
+        if not retrieval_config.stream_responses:
+            resp = query(q, filters)
+            print("\n🧠 Answer:\n", resp)
+            print_sources(resp.source_nodes)
+            continue
+
+        # Sources are known before the first token, show them while it streams
+        resp = stream_query(q, filters)
+        print_sources(resp.source_nodes)
+        print("\n🧠 Answer:\n", end=" ", flush=True)
+        for token in resp.response_gen:
+            print(token, end="", flush=True)
+        print()
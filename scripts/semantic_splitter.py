@@ -0,0 +1,196 @@
+"""
+Batched Semantic Splitter
+
+Drop-in replacement for LlamaIndex's SemanticSplitterNodeParser that
+produces the same node boundaries but works on many documents at once:
+the sentence groups of a whole block of pages are embedded in a few large
+batch requests, and the adjacent cosine distances and per-document
+percentile breakpoints are computed with NumPy instead of Python loops.
+"""
+
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.node_parser.node_utils import build_nodes_from_splits
+from llama_index.core.node_parser.text.utils import split_by_sentence_tokenizer
+from llama_index.core.schema import BaseNode, Document, MetadataMode, TextNode
+
+
+_sentence_splitter: Optional[Callable[[str], List[str]]] = None
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text with LlamaIndex's default sentence tokenizer
+
+    The tokenizer is created once per process, so this can be mapped over a
+    process pool.
+    """
+    global _sentence_splitter
+    if _sentence_splitter is None:
+        _sentence_splitter = split_by_sentence_tokenizer()
+    return _sentence_splitter(text)
+
+
+def sentence_groups(sentences: Sequence[str], buffer_size: int = 1) -> List[str]:
+    """Each sentence joined with buffer_size neighbours on both sides"""
+    return [
+        "".join(sentences[max(0, i - buffer_size):i + buffer_size + 1])
+        for i in range(len(sentences))
+    ]
+
+
+def _row_dots(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Stacked matmul gives bit-identical results to a per-row np.dot (which
+    # BaseEmbedding.similarity uses), unlike einsum or sum(a * b); ties at
+    # the percentile threshold then break the same way
+    return np.matmul(a[:, None, :], b[:, :, None])[:, 0, 0]
+
+
+def adjacent_distances(embeddings: np.ndarray) -> np.ndarray:
+    """Cosine distance between each embedding and the next one"""
+    norms = np.sqrt(_row_dots(embeddings, embeddings))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 1.0 - _row_dots(embeddings[:-1], embeddings[1:]) / (norms[:-1] * norms[1:])
+
+
+def breakpoints(distances: np.ndarray, percentile: float) -> np.ndarray:
+    """Indices of the distances above the given percentile of the document"""
+    if distances.size == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(distances > np.percentile(distances, percentile))
+
+
+def split_at(sentences: Sequence[str], cuts: Iterable[int]) -> List[str]:
+    """
+    Join sentences into chunks, ending a chunk after every cut index
+
+    Matches SemanticSplitterNodeParser, including its single space-joined
+    chunk for documents too short to have any distance.
+    """
+    if len(sentences) < 2:
+        return [" ".join(sentences)]
+    chunks = []
+    start = 0
+    for cut in cuts:
+        chunks.append("".join(sentences[start:cut + 1]))
+        start = cut + 1
+    if start < len(sentences):
+        chunks.append("".join(sentences[start:]))
+    return chunks
+
+
+def attach_to_document(nodes: Sequence[BaseNode], doc: Document) -> None:
+    """
+    Add document metadata and char spans to chunk nodes, as the
+    post-processing of NodeParser.get_nodes_from_documents does
+    """
+    search_start = 0
+    for node in nodes:
+        content = node.get_content(metadata_mode=MetadataMode.NONE)
+        start = doc.text.find(content, search_start)
+        if start >= 0 and isinstance(node, TextNode):
+            node.start_char_idx = start
+            node.end_char_idx = start + len(content)
+            search_start = start + 1
+        node.metadata = {**doc.metadata, **node.metadata}
+
+
+class BatchedSemanticSplitter:
+    """Semantic chunking of many documents per embedding batch"""
+
+    def __init__(
+        self,
+        embed_model: BaseEmbedding,
+        buffer_size: int = 1,
+        breakpoint_percentile_threshold: float = 95,
+        sentence_splitter: Optional[Callable[[str], List[str]]] = None,
+        docs_per_batch: int = 64,
+    ):
+        """
+        Args:
+            embed_model: Model used to embed sentence groups
+            buffer_size: Neighbouring sentences grouped with each sentence
+            breakpoint_percentile_threshold: Percentile of a document's
+                adjacent distances above which a new chunk starts
+            sentence_splitter: Text → sentences (LlamaIndex's default tokenizer)
+            docs_per_batch: Documents whose sentence groups are embedded
+                together; bounds memory on large books
+        """
+        self.embed_model = embed_model
+        self.buffer_size = buffer_size
+        self.breakpoint_percentile_threshold = breakpoint_percentile_threshold
+        self.sentence_splitter = sentence_splitter or split_sentences
+        self.docs_per_batch = docs_per_batch
+
+    def chunk_sentences(self, sentence_lists: Sequence[Sequence[str]]) -> List[List[str]]:
+        """
+        Group already split sentences into semantic chunks, one embedding pass
+
+        Args:
+            sentence_lists: Sentences of each document
+
+        Returns:
+            Chunk texts of each document, in order
+        """
+        groups = [g for s in sentence_lists for g in sentence_groups(s, self.buffer_size)]
+        if not groups:
+            return [split_at(s, ()) for s in sentence_lists]
+
+        embeddings = np.asarray(self.embed_model.get_text_embedding_batch(groups), dtype=np.float64)
+        # One distance array over all groups; pairs spanning two documents
+        # are simply never read
+        distances = adjacent_distances(embeddings)
+
+        chunks = []
+        offset = 0
+        for sentences in sentence_lists:
+            n = len(sentences)
+            doc_distances = distances[offset:offset + max(n - 1, 0)]
+            cuts = breakpoints(doc_distances, self.breakpoint_percentile_threshold)
+            chunks.append(split_at(sentences, cuts.tolist()))
+            offset += n
+        return chunks
+
+    def split_texts(self, texts: Sequence[str]) -> List[List[str]]:
+        """
+        Split several texts into semantic chunks with one embedding pass
+
+        Args:
+            texts: Document texts
+
+        Returns:
+            Chunk texts of each document, in order
+        """
+        return self.chunk_sentences([self.sentence_splitter(text) for text in texts])
+
+    @staticmethod
+    def build_nodes(doc: Document, chunks: Sequence[str]) -> List[BaseNode]:
+        """Chunk nodes of a document, with its metadata and char spans"""
+        nodes = build_nodes_from_splits(list(chunks), doc)
+        attach_to_document(nodes, doc)
+        return nodes
+
+    def iter_nodes(self, documents: Iterable[Document]) -> Iterator[Tuple[Document, List[BaseNode]]]:
+        """
+        Split documents lazily, docs_per_batch at a time
+
+        Args:
+            documents: Documents (any iterable, e.g. a streamed JSONL reader)
+
+        Yields:
+            (document, its semantic nodes) in input order
+        """
+        documents = iter(documents)
+        while True:
+            block = list(islice(documents, self.docs_per_batch))
+            if not block:
+                return
+            for doc, chunks in zip(block, self.split_texts([doc.text for doc in block])):
+                yield doc, self.build_nodes(doc, chunks)
+
+    def get_nodes_from_documents(self, documents: Sequence[Document]) -> List[BaseNode]:
+        """Semantic nodes of all documents, like NodeParser.get_nodes_from_documents"""
+        return [node for _, nodes in self.iter_nodes(documents) for node in nodes]
@@ -0,0 +1,204 @@
+"""
+Compact Sentence-Window Nodes
+
+SentenceWindowNodeParser stores the whole window (and the sentence again)
+in the metadata of every sentence node, so each sentence is kept about
+2 * window_size + 2 times. Here each page's sentences are stored once, in a
+row-addressable sentence store, and a sentence-window node record only
+keeps where its sentence and window are:
+
+    {"node_id", "page_row", "sentence", "window": [start, end],
+     "start_char_idx", "end_char_idx", "parser_type": "sentence_window"}
+
+Node text and the window are rebuilt from the store on demand: indexed
+sentence nodes carry only their position (POSITION_KEYS), and
+SentenceWindowPostprocessor expands retrieved sentences to their windows
+just before synthesis.
+
+Files in a sentence store directory (a side table, one row per page):
+    nodes.jsonl    {"page_id", "metadata", "sentences": [...]} per page
+    offsets.npy    byte offset of each page row
+    metadata.npz   chapter_id / lecture_id / page columns
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+
+from side_table import SideTable
+
+WINDOW_METADATA_KEY = "window"
+ORIGINAL_TEXT_METADATA_KEY = "original_text"
+
+# Where a sentence node sits in the store; kept out of embedding and prompts
+POSITION_KEYS = ("page_row", "sentence", "window_start", "window_end")
+
+
+def window_bounds(index: int, count: int, window_size: int) -> Tuple[int, int]:
+    """Sentence slice [start, end) of the window around a sentence"""
+    return max(0, index - window_size), min(index + window_size + 1, count)
+
+
+def sentence_spans(text: str, sentences: Sequence[str]) -> List[Optional[Tuple[int, int]]]:
+    """Char span of each sentence in text, located the way NodeParser does"""
+    spans: List[Optional[Tuple[int, int]]] = []
+    search_start = 0
+    for sentence in sentences:
+        start = text.find(sentence, search_start)
+        if start < 0:
+            spans.append(None)
+            continue
+        spans.append((start, start + len(sentence)))
+        search_start = start + 1
+    return spans
+
+
+def compact_window_records(
+    page_row: int,
+    text: str,
+    sentences: Sequence[str],
+    window_size: int = 3
+) -> List[Dict[str, Any]]:
+    """
+    Compact sentence-window records of one page (without node ids)
+
+    Args:
+        page_row: Row of the page in the sentence store
+        text: Page text
+        sentences: Sentences of text, in order
+        window_size: Sentences kept on each side in the window
+
+    Returns:
+        One record per sentence
+    """
+    records = []
+    for i, span in enumerate(sentence_spans(text, sentences)):
+        start, end = span if span else (None, None)
+        records.append({
+            "page_row": page_row,
+            "sentence": i,
+            "window": list(window_bounds(i, len(sentences), window_size)),
+            "start_char_idx": start,
+            "end_char_idx": end,
+            "parser_type": "sentence_window",
+        })
+    return records
+
+
+class SentenceStore(SideTable):
+    """Per-page sentence arrays, read lazily by row"""
+
+    def sentences(self, page_row: int) -> List[str]:
+        return self.record(page_row)["sentences"]
+
+    def metadata(self, page_row: int) -> Dict[str, Any]:
+        return self.record(page_row).get("metadata") or {}
+
+    def sentence(self, record: Dict[str, Any]) -> str:
+        """Text of a compact record's sentence"""
+        return self.sentences(record["page_row"])[record["sentence"]]
+
+    def window(self, record: Dict[str, Any]) -> str:
+        """Window text of a compact record"""
+        start, end = record["window"]
+        return " ".join(self.sentences(record["page_row"])[start:end])
+
+    def window_node(self, record: Dict[str, Any], with_window: bool = False) -> TextNode:
+        """
+        Rebuild the TextNode of a compact record
+
+        Args:
+            record: Compact sentence-window record
+            with_window: Also put "window" and "original_text" in the
+                metadata, as SentenceWindowNodeParser does
+
+        Returns:
+            TextNode with the page metadata and POSITION_KEYS (plus the
+            window if requested)
+        """
+        text = self.sentence(record)
+        metadata = dict(self.metadata(record["page_row"]))
+        excluded = list(POSITION_KEYS)
+        metadata.update(zip(POSITION_KEYS, (record["page_row"], record["sentence"], *record["window"])))
+        if with_window:
+            metadata[WINDOW_METADATA_KEY] = self.window(record)
+            metadata[ORIGINAL_TEXT_METADATA_KEY] = text
+            # Keep the window out of the embedded and LLM-visible metadata text
+            excluded += [WINDOW_METADATA_KEY, ORIGINAL_TEXT_METADATA_KEY]
+        return TextNode(
+            text=text,
+            id_=record["node_id"],
+            metadata=metadata,
+            start_char_idx=record.get("start_char_idx"),
+            end_char_idx=record.get("end_char_idx"),
+            excluded_embed_metadata_keys=excluded,
+            excluded_llm_metadata_keys=list(excluded),
+        )
+
+
+class SentenceWindowPostprocessor(BaseNodePostprocessor):
+    """
+    Replaces retrieved sentence nodes with their sentence windows
+
+    Windows of the same page that overlap or touch are merged into one
+    node (scored by its best hit), so no sentence is sent to the LLM twice.
+    Nodes without a store position are passed through unchanged.
+    """
+
+    _store: SentenceStore = PrivateAttr()
+
+    def __init__(self, store: SentenceStore, **kwargs: Any):
+        """
+        Args:
+            store: Sentence store written by make_semantic_nodes.py
+        """
+        super().__init__(**kwargs)
+        self._store = store
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "SentenceWindowPostprocessor"
+
+    def _postprocess_nodes(
+        self,
+        nodes: List[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None,
+    ) -> List[NodeWithScore]:
+        # [page_row, start, end, best hit, rank of best hit], in hit order
+        spans: List[list] = []
+        ranked: List[Tuple[int, NodeWithScore]] = []
+        for rank, hit in enumerate(nodes):
+            metadata = hit.node.metadata
+            if metadata.get("page_row") is None:
+                ranked.append((rank, hit))
+                continue
+            row, start, end = metadata["page_row"], metadata["window_start"], metadata["window_end"]
+            touching = [s for s in spans if s[0] == row and start <= s[2] and end >= s[1]]
+            if not touching:
+                spans.append([row, start, end, hit, rank])
+                continue
+            # A window can bridge two earlier ones; fold them all into the first
+            first = touching[0]
+            for span in touching:
+                first[1], first[2] = min(first[1], span[1], start), max(first[2], span[2], end)
+            for span in touching[1:]:
+                spans.remove(span)
+
+        for row, start, end, hit, rank in spans:
+            metadata = dict(hit.node.metadata)
+            metadata.update(window_start=start, window_end=end)
+            metadata[ORIGINAL_TEXT_METADATA_KEY] = hit.node.get_content()
+            excluded = list(POSITION_KEYS) + [ORIGINAL_TEXT_METADATA_KEY]
+            node = TextNode(
+                text=" ".join(self._store.sentences(row)[start:end]),
+                id_=hit.node.node_id,
+                metadata=metadata,
+                excluded_embed_metadata_keys=excluded,
+                excluded_llm_metadata_keys=list(excluded),
+            )
+            ranked.append((rank, NodeWithScore(node=node, score=hit.score)))
+        # Windows keep the rank of their best hit, passthrough nodes their own
+        ranked.sort(key=lambda item: item[0])
+        return [hit for _, hit in ranked]
@@ -0,0 +1,189 @@
+"""
+Node Side Table
+
+Row-addressable JSON Lines file of node records (text + metadata) used by
+the local retrieval stores. A byte-offset array lets a single row be read
+without loading the whole file, and int32 metadata columns are stored
+alongside for prefiltering.
+
+Files in a store directory:
+    nodes.jsonl    one {"node_id", "text", "metadata", ...} record per row
+    offsets.npy    byte offset of each row's line in nodes.jsonl
+    metadata.npz   chapter_id / lecture_id / page columns
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from llama_index.core.schema import BaseNode, TextNode
+
+from metadata_filter import MetadataIndex, metadata_columns
+
+PathLike = Union[str, Path]
+
+RECORD_CACHE_SIZE = 4096  # records SideTable keeps after reading them
+
+
+def node_record(node: BaseNode) -> Dict[str, Any]:
+    """Serializable record of a node, as stored in nodes.jsonl"""
+    return {
+        "node_id": node.node_id,
+        "text": node.get_content(),
+        "metadata": node.metadata,
+        "start_char_idx": getattr(node, "start_char_idx", None),
+        "end_char_idx": getattr(node, "end_char_idx", None),
+    }
+
+
+class SideTableWriter:
+    """Incremental writer of a side table (context manager)"""
+
+    def __init__(self, out_dir: PathLike):
+        """
+        Args:
+            out_dir: Store directory (created if needed)
+        """
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._offsets: List[int] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._file = None
+
+    def __enter__(self) -> "SideTableWriter":
+        self._file = open(self.out_dir / "nodes.jsonl", "wb")
+        return self
+
+    def write(self, record: Dict[str, Any]) -> int:
+        """Append a record and return its row number"""
+        self._offsets.append(self._file.tell())
+        self._file.write(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+        self._file.write(b"\n")
+        self._metadata.append({"metadata": record.get("metadata")})
+        return len(self._offsets) - 1
+
+    @property
+    def count(self) -> int:
+        return len(self._offsets)
+
+    def __exit__(self, *exc) -> None:
+        self._file.close()
+        np.save(self.out_dir / "offsets.npy", np.asarray(self._offsets, dtype=np.int64))
+        np.savez(self.out_dir / "metadata.npz", **metadata_columns(self._metadata))
+
+
+def write_side_table(out_dir: PathLike, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    Write node records with their row offsets and metadata columns
+
+    Args:
+        out_dir: Store directory (created if needed)
+        records: Node records in row order
+
+    Returns:
+        Number of rows written
+    """
+    with SideTableWriter(out_dir) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+class SideTable:
+    """
+    Lazy reader for a side table written by write_side_table
+
+    Usable as a context manager; close() closes the file handles of every
+    thread that read from it.
+    """
+
+    def __init__(self, store_dir: PathLike, cache_size: int = RECORD_CACHE_SIZE):
+        """
+        Open a side table (records are read on demand)
+
+        Args:
+            store_dir: Directory containing nodes.jsonl and offsets.npy
+            cache_size: Most recently read records to keep in memory
+        """
+        store_dir = Path(store_dir)
+        self.offsets = np.load(store_dir / "offsets.npy")
+        self._nodes_path = store_dir / "nodes.jsonl"
+        # One file handle per thread: seek + readline on a shared handle races
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._files: List[Any] = []
+        self._nodes_file()
+        self._cache_size = cache_size
+        self._records: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._metadata_path = store_dir / "metadata.npz"
+        self._metadata_index: Optional[MetadataIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def metadata_index(self) -> MetadataIndex:
+        """Inverted index over chapter/lecture/page, built on first use"""
+        if self._metadata_index is None:
+            if self._metadata_path.exists():
+                with np.load(self._metadata_path) as data:
+                    columns = {field: data[field] for field in data.files}
+            else:
+                # Stores exported before metadata.npz existed
+                columns = metadata_columns(self.record(row) for row in range(len(self)))
+            self._metadata_index = MetadataIndex(columns)
+        return self._metadata_index
+
+    def _nodes_file(self):
+        nodes_file = getattr(self._local, "nodes_file", None)
+        if nodes_file is None:
+            nodes_file = self._local.nodes_file = open(self._nodes_path, "rb")
+            with self._lock:
+                self._files.append(nodes_file)
+        return nodes_file
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Read (and memoize, LRU-bounded) the record of one row; safe to call from several threads"""
+        with self._lock:
+            record = self._records.get(row)
+            if record is not None:
+                self._records.move_to_end(row)
+                return record
+
+        nodes_file = self._nodes_file()
+        nodes_file.seek(int(self.offsets[row]))
+        record = json.loads(nodes_file.readline())
+        with self._lock:
+            self._records[row] = record
+            if len(self._records) > self._cache_size:
+                self._records.popitem(last=False)
+        return record
+
+    def close(self) -> None:
+        """Close the file handles and drop memoized records"""
+        with self._lock:
+            for nodes_file in self._files:
+                nodes_file.close()
+            self._files.clear()
+            self._records.clear()
+        self._local = threading.local()
+
+    def __enter__(self) -> "SideTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def to_node(self, row: int) -> TextNode:
+        """Rebuild the TextNode for a row"""
+        record = self.record(row)
+        return TextNode(
+            text=record["text"],
+            id_=record["node_id"],
+            metadata=record.get("metadata") or {},
+            start_char_idx=record.get("start_char_idx"),
+            end_char_idx=record.get("end_char_idx"),
+        )